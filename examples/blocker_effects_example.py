@@ -9,7 +9,6 @@ the opponent cannot have a given card.
 from argparse import ArgumentParser
 from pious.pio import compute_single_card_blocker_effects, make_solver
 
-
 parser = ArgumentParser()
 parser.add_argument("cfr_path")
 parser.add_argument("node_id")
@@ -43,6 +42,8 @@ cards_to_print = args.cards
 
 solver = make_solver()
 solver.load_tree(args.cfr_path)
+if not solver.has_node(args.node_id):
+    raise ValueError(f"No such node {args.node_id} in {args.cfr_path}")
 effects = compute_single_card_blocker_effects(solver, args.node_id, args.num_hist_bins)
 
 if print_per_card_data:
@@ -17,6 +17,9 @@ def exec_blockers(args: Namespace):
         exit(-1)
     solver = make_solver()
     solver.load_tree(solve_path)
+    if not solver.has_node(node_id):
+        print(f"No such node {node_id} in {solve_path}, exiting")
+        exit(-1)
     blocker_effects = compute_single_card_blocker_effects(
         solver, node_id, num_hist_bins
     )
@@ -4,12 +4,13 @@ lines and nodes.
 """
 
 from argparse import Namespace, _SubParsersAction
-from typing import List
+from typing import AbstractSet, List, Optional
 from ansi.color import fg, fx
 from sys import exit
 from os import path as osp
 
 from pious.pio.solver import Solver
+from pious.pio.util import cached_show_all_lines
 from ..pio import (
     make_solver,
     Line,
@@ -31,15 +32,14 @@ def exec_lines(args: Namespace):
 
     solver = make_solver()
     solver.load_tree(solve_file)
-    solver.load_all_nodes()
 
     root_node_info = solver.show_node("r:0")
-    all_lines_str = solver.show_all_lines()
+    all_lines_str = cached_show_all_lines(solver, solve_file)
 
     if args.show_all:
         show_all_lines(all_lines_str, solver)
     if args.count:
-        all_lines = [Line(line, starting_street=FLOP) for line in all_lines_str]
+        all_lines = Line.from_strings_bulk(all_lines_str, starting_street=FLOP)
         count(all_lines, root_node_info)
     if args.valid is not None:
         lines_are_valid(args.valid, all_lines_str)
@@ -66,12 +66,21 @@ def count(all_lines: List[Line], root_node_info):
 
 
 def lines_are_valid(lines_to_check: List[str], all_lines: List[str]):
-    for line in lines_to_check:
-        line_is_valid(line, all_lines)
-
-
-def line_is_valid(line: str, all_lines: List[str]):
+    # Build the membership set once rather than once per checked line
     line_set = set(all_lines)
+    for line in lines_to_check:
+        line_is_valid(line, all_lines, line_set)
+
+
+def line_is_valid(
+    line: str, all_lines: List[str], line_set: Optional[AbstractSet[str]] = None
+):
+    """
+    Print whether `line` is in `all_lines` and, if not, where it leaves the
+    tree. `line_set` is `set(all_lines)`, if the caller already has it.
+    """
+    if line_set is None:
+        line_set = set(all_lines)
     if line in line_set:
         print(f"Line {fg.bold}{fg.green}{line}{fx.reset} is valid")
         return True
@@ -94,7 +103,7 @@ def line_is_valid(line: str, all_lines: List[str]):
             num_colons = last_subline.count(":") + 1
             valid_extensions = [
                 l
-                for l in line_set
+                for l in all_lines
                 if l.startswith(last_subline) and l.count(":") == num_colons
             ]
             print(
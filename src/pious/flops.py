@@ -1,21 +1,242 @@
 """
 defines he 'Flops' class that allows convenient filtering of flops by board texture.
+
+This also holds the flop parsing and texture computation shared with
+`pious.pio.aggregation.AggregationReport`.
 """
 
+import sys
+import numpy as np
 import pandas as pd
+from typing import List
 from .resources import get_all_flops
-from .util import card_tuple, ranks_rev, ahml
+from .util import ranks, ranks_rev, ahml, VisibleColumns
+
+# Suits, in the order they are sorted when ordering flops
+SUIT_DTYPE = pd.CategoricalDtype(["c", "d", "h", "s"])
+# Map ASCII rank and suit characters to ranks and `SUIT_DTYPE` codes. Other
+# characters map to 0 and -1, respectively.
+_RANK_LUT = np.zeros(256, dtype=np.int8)
+for _rank, _value in ranks.items():
+    if len(_rank) == 1:
+        _RANK_LUT[ord(_rank)] = _value
+_SUIT_LUT = np.full(256, -1, dtype=np.int8)
+for _code, _suit in enumerate(SUIT_DTYPE.categories):
+    _SUIT_LUT[ord(_suit)] = _code
+
+# Connectedness codes used while computing textures, and their names
+_DISCONNECTED, _GUTSHOT, _OESD, _STRAIGHT = range(4)
+_CONNECTEDNESS_NAMES = np.array(
+    ["DISCONNECTED", "GUTSHOT", "OESD", "STRAIGHT"], dtype=object
+)
+# Pads missing distinct ranks when looking for straight draws
+_NO_RANK = -100
+# Texture labels, indexed by rank
+_HIGH_CARD_BY_RANK = np.array(
+    [f"{ranks_rev[r]}_high" if r in ranks_rev else "" for r in range(15)],
+    dtype=object,
+)
+_AHML_BY_RANK = np.array([ahml(r) for r in range(15)], dtype=object)
+# Texture label columns have small, fixed vocabularies and are stored as
+# categoricals, so filters compare integer codes rather than strings
+PAIREDNESS_DTYPE = pd.CategoricalDtype(["UNPAIRED", "PAIRED", "TOAK"])
+SUITEDNESS_DTYPE = pd.CategoricalDtype(["RAINBOW", "FD", "MONOTONE"])
+CONNECTEDNESS_DTYPE = pd.CategoricalDtype(_CONNECTEDNESS_NAMES)
+HIGH_CARD_DTYPE = pd.CategoricalDtype(_HIGH_CARD_BY_RANK[2:])
+
+
+def _flop_bytes(raw_flops: pd.Series) -> np.ndarray:
+    """
+    Return the ASCII bytes of each flop's cards, with any whitespace removed,
+    as an (n, 6) array
+    """
+    # Flops are usually laid out as "Rs Rs Rs" or "RsRsRs", and can be decoded
+    # without touching the individual strings
+    lengths = raw_flops.str.len()
+    if (lengths == 8).all():
+        buf = np.frombuffer("".join(raw_flops).encode("ascii"), dtype=np.uint8)
+        buf = buf.reshape(-1, 8)
+        if (buf[:, 2] == ord(" ")).all() and (buf[:, 5] == ord(" ")).all():
+            return buf[:, [0, 1, 3, 4, 6, 7]]
+    elif (lengths == 6).all():
+        buf = np.frombuffer("".join(raw_flops).encode("ascii"), dtype=np.uint8)
+        return buf.reshape(-1, 6)
+    raw_flops = raw_flops.str.replace(r"\s+", "", regex=True)
+    if not (raw_flops.str.len() == 6).all():
+        raise ValueError("Invalid flops: expected three cards")
+    buf = np.frombuffer("".join(raw_flops).encode("ascii"), dtype=np.uint8)
+    return buf.reshape(-1, 6)
+
+
+def process_flops(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the `flop` column of `df`, returning a new dataframe ordered by
+    descending flop. The original flop strings are kept in `raw_flop`, ranks
+    and suits are split out into `r1`...`r3` and `s1`...`s3`, and `flop`
+    holds a `((r1, r2, r3), (s1, s2, s3))` tuple.
+
+    >>> process_flops(pd.DataFrame({"flop": ["2c 3d 4h", "As 9s 6h"]}))["r1"].tolist()
+    [14, 2]
+    """
+    df = df.rename(columns={"flop": "raw_flop"})
+    # Intern flop names: every report in a tree holds the same flops, so
+    # this shares the strings between reports and lets hashing/joins on
+    # `raw_flop` (e.g., in `AggregationComparator`) short-circuit on identity
+    df["raw_flop"] = df["raw_flop"].map(sys.intern)
+
+    # Decode ranks and suits straight from the flops' bytes
+    buf = _flop_bytes(df["raw_flop"])
+    r = _RANK_LUT[buf[:, 0::2]]
+    c = _SUIT_LUT[buf[:, 1::2]]
+    if (r == 0).any() or (c < 0).any():
+        raise ValueError("Invalid flops: unrecognized rank or suit")
+
+    # Ranks are stored as int64 rather than the lookup table's int8: filter
+    # queries do arithmetic on them (e.g., `r1 * r2 > 100`), which would
+    # silently overflow in a narrow dtype
+    r = r.astype(np.int64)
+    c = c.astype(np.int64)
+    for i in range(3):
+        df[f"r{i + 1}"] = r[:, i]
+    for i in range(3):
+        df[f"s{i + 1}"] = pd.Categorical.from_codes(c[:, i], dtype=SUIT_DTYPE)
+    suits = SUIT_DTYPE.categories.to_numpy()[c]
+    df["flop"] = list(zip(map(tuple, r.tolist()), map(tuple, suits.tolist())))
+
+    # Order flops by descending (ranks, suits), with suits ordered
+    # alphabetically, by packing both into a single integer key
+    key = (r[:, 0] << 20) | (r[:, 1] << 16) | (r[:, 2] << 12)
+    key |= (c[:, 0] << 8) | (c[:, 1] << 4) | c[:, 2]
+    order = np.argsort(-key, kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+
+def compute_textures(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a copy of `df`, which must have been run through `process_flops`,
+    with texture columns added. This works on whole columns at once: ranks
+    and suits are compared pairwise, and straight draws are found by walking
+    the gaps between each flop's distinct ranks in lockstep.
+    """
+    df = df.copy()
+    n = len(df)
+    r = df[["r1", "r2", "r3"]].to_numpy(dtype=np.int64)
+    s = np.column_stack([df[col].cat.codes for col in ("s1", "s2", "s3")])
+
+    # Pairedness
+    r12, r23, r13 = r[:, 0] == r[:, 1], r[:, 1] == r[:, 2], r[:, 0] == r[:, 2]
+    toak = r12 & r23
+    unpaired = ~(r12 | r23 | r13)
+    paired = ~unpaired & ~toak
+    pairedness = np.where(
+        unpaired, "UNPAIRED", np.where(paired, "PAIRED", "TOAK")
+    ).astype(object)
+
+    # Suitedness
+    s12, s23, s13 = s[:, 0] == s[:, 1], s[:, 1] == s[:, 2], s[:, 0] == s[:, 2]
+    flush = s12 & s23
+    rainbow = ~(s12 | s23 | s13)
+    flushdraw = ~rainbow & ~flush
+    suitedness = np.where(
+        rainbow, "RAINBOW", np.where(flushdraw, "FD", "MONOTONE")
+    ).astype(object)
+
+    # Straights. Only ace-low straights are marked as wheels, and no
+    # straight is marked as broadway.
+    max_r = r.max(axis=1)
+    has_ace = (r == 14).any(axis=1)
+    ace_low_straight = has_ace & ((r % 14).max(axis=1) <= 5)
+    straight = unpaired & (max_r - r.min(axis=1) < 5)
+    wheel = unpaired & ~straight & ace_low_straight
+    straight |= wheel
+    broadway = np.zeros(n, dtype=bool)
+
+    # Straight draws: walk adjacent pairs of each flop's distinct ranks,
+    # from high to low, with aces also counting as 1. Missing ranks are
+    # padded with a sentinel that can't form a draw with anything.
+    connectedness = np.where(straight, _STRAIGHT, _DISCONNECTED)
+    u = -np.sort(-r, axis=1)
+    u[:, 1:][u[:, 1:] == u[:, :-1]] = _NO_RANK
+    u = np.column_stack([u, np.where(has_ace, 1, _NO_RANK)])
+    u = -np.sort(-u, axis=1)
+
+    oesd = np.zeros(n, dtype=bool)
+    gutshot = np.zeros(n, dtype=bool)
+    straightdraw = np.zeros(n, dtype=bool)
+    wheeldraw = np.zeros(n, dtype=bool)
+    broadwaydraw = np.zeros(n, dtype=bool)
+    # Flops still looking for a draw: we stop at the first OESD
+    searching = ~straight
+    for i in range(u.shape[1] - 1):
+        hi, lo = u[:, i], u[:, i + 1]
+        gap = hi - lo
+        close = searching & (gap > 0) & (gap <= 3)
+        # Close cards make for an open ended straight draw EXCEPT for when
+        # one of the cards is an ace
+        ace_high_draw = close & (hi == 14)
+        ace_low_draw = close & (lo == 1)
+        open_ended = close & (lo != 1)
+        four_gap = searching & (gap == 4)
+
+        connectedness[ace_high_draw | ace_low_draw | four_gap] = _GUTSHOT
+        connectedness[open_ended] = _OESD
+        broadwaydraw |= ace_high_draw
+        wheeldraw |= ace_low_draw
+        oesd |= open_ended
+        gutshot |= open_ended | four_gap
+        straightdraw |= close | four_gap
+        searching &= ~open_ended
+
+    high_card = _HIGH_CARD_BY_RANK[max_r]
+    ahml_label = (
+        _AHML_BY_RANK[r[:, 0]] + _AHML_BY_RANK[r[:, 1]] + _AHML_BY_RANK[r[:, 2]]
+    )
+    connectedness = _CONNECTEDNESS_NAMES[connectedness]
+
+    # Assign every texture column in a single block insert rather than
+    # one setitem per column
+    textures = {
+        "pairedness": pd.Categorical(pairedness, dtype=PAIREDNESS_DTYPE),
+        "suitedness": pd.Categorical(suitedness, dtype=SUITEDNESS_DTYPE),
+        "connectedness": pd.Categorical(connectedness, dtype=CONNECTEDNESS_DTYPE),
+        "high_card": pd.Categorical(high_card, dtype=HIGH_CARD_DTYPE),
+        "ahml": pd.Categorical(ahml_label),
+        "texture": pd.Series(
+            list(zip(high_card, pairedness, suitedness, connectedness, ahml_label)),
+            index=df.index,
+            dtype=object,
+        ),
+        "flush": flush,
+        "flushdraw": flushdraw,
+        "rainbow": rainbow,
+        "straight": straight,
+        "oesd": oesd,
+        "gutshot": gutshot,
+        "straightdraw": straightdraw,
+        "disconnected": np.zeros(n, dtype=bool),
+        "wheeldraw": wheeldraw,
+        "broadwaydraw": broadwaydraw,
+        "toak": toak,
+        "paired": paired,
+        "unpaired": unpaired,
+        "wheel": wheel,
+        "broadway": broadway,
+    }
+    df[list(textures)] = pd.DataFrame(textures, index=df.index)
+    return df
 
 
 class Flops:
     def __init__(self):
         self._df = pd.DataFrame(data={"flop": get_all_flops()})
         self.hidden_columns = []
-        self.set_default_hidden_columns()
+        self._visible_cols = VisibleColumns()
         self._current_filters = []
+        # The view before each of `self._current_filters` was applied
+        self._view_stack: List[pd.DataFrame] = []
         self._process_flops()
-        self._compute_textures()
-        self._view = self._df.copy()
+        self.set_default_hidden_columns()
+        self.reset()
 
     def view(self) -> pd.DataFrame:
         """
@@ -27,17 +248,17 @@ class Flops:
         leaving the actual view unchanged.
         """
 
-        result = self._view.copy()
-        to_drop = [c for c in self.hidden_columns if c in result]
-        result.drop(columns=to_drop, inplace=True)
-        return result
+        visible = self._visible_cols(self._df.columns, self.hidden_columns)
+        return self._view[visible]
 
     def reset(self, filter=None):
         """
         Reset the view, optionally with a new filter
         """
-        self._view = self._df.copy()
+        # The view is never modified in place, so it can share `self._df`
+        self._view = self._df
         self._current_filters = []
+        self._view_stack = []
         if filter:
             self.filter(filter)
         return self
@@ -56,20 +277,20 @@ class Flops:
         ```
         """
         self._current_filters.append(query_string)
-        self._view.query(expr=query_string, inplace=True)
+        self._view_stack.append(self._view)
+        self._view = self._view.query(expr=query_string)
         return self
 
     def undo_filter(self, n=1):
         """
         Remove the last n filters from the view
         """
-        if n <= 0:
+        if n <= 0 or not self._view_stack:
             return
-        cf = self._current_filters[:-n]
-        self.reset()
-        for f in cf:
-            self.filter(f)
-        self._current_filters = cf
+        n = min(n, len(self._view_stack))
+        self._view = self._view_stack[-n]
+        del self._view_stack[-n:]
+        del self._current_filters[-n:]
 
     def _process_flops(self):
         """
@@ -77,166 +298,7 @@ class Flops:
         once. This cleans up some data to ensure that flops are ordered
         correctly, ranks and suits are easily accessible, etc.
         """
-        df = self._df
-        df.rename(columns={"flop": "raw_flop"}, inplace=True)
-        flops_s = df["raw_flop"]
-        flops_t = []
-        rs1, rs2, rs3, ss1, ss2, ss3 = [], [], [], [], [], []
-        for flop in flops_s:
-            c1, c2, c3 = flop[:2], flop[2:4], flop[4:]
-            r1, s1 = card_tuple(c1)
-            r2, s2 = card_tuple(c2)
-            r3, s3 = card_tuple(c3)
-            rs1.append(r1)
-            ss1.append(s1)
-            rs2.append(r2)
-            ss2.append(s2)
-            rs3.append(r3)
-            ss3.append(s3)
-
-            flops_t.append(((r1, r2, r3), (s1, s2, s3)))
-
-        df["r1"] = rs1
-        df["r2"] = rs2
-        df["r3"] = rs3
-        df["s1"] = ss1
-        df["s2"] = ss2
-        df["s3"] = ss3
-        df["flop"] = flops_t
-        df.sort_values(by="flop", ascending=False, inplace=True)
-        df.reset_index(drop=True, inplace=True)
-
-    def _compute_textures(self):
-        """
-        Compute texture columns
-        """
-        df = self._df
-        df["pairedness"] = None
-        df["suitedness"] = None
-        df["connectedness"] = None
-        df["high_card"] = None
-        df["ahml"] = None
-
-        df["texture"] = None
-
-        df["flush"] = False
-        df["flushdraw"] = False
-        df["rainbow"] = False
-
-        df["straight"] = False
-        df["oesd"] = False
-        df["gutshot"] = False
-        df["straightdraw"] = False
-        df["disconnected"] = False
-        df["wheeldraw"] = False
-        df["broadwaydraw"] = False
-
-        df["toak"] = False
-        df["paired"] = False
-        df["unpaired"] = False
-
-        df["wheel"] = False
-        df["broadway"] = False
-
-        for idx, row in df.iterrows():
-            flop = row["flop"]
-            ranks, suits = flop
-            modulo_ranks = [r % 14 for r in ranks]
-
-            # High card
-            high_card = ranks_rev[max(ranks)] + "_high"
-
-            # AHML
-            ahml_label = "".join([ahml(r) for r in ranks])
-
-            # Pairedness
-            pairedness = None
-            n_ranks = len(set(ranks))
-            if n_ranks == 3:
-                pairedness = "UNPAIRED"
-                df.at[idx, "unpaired"] = True
-            elif n_ranks == 2:
-                pairedness = "PAIRED"
-                df.at[idx, "paired"] = True
-            elif n_ranks == 1:
-                pairedness = "TOAK"
-                df.at[idx, "toak"] = True
-
-            # Suitedness
-            suitedness = None
-            n_suits = len(set(suits))
-            if n_suits == 3:
-                suitedness = "RAINBOW"
-                df.at[idx, "rainbow"] = True
-            elif n_suits == 2:
-                suitedness = "FD"
-                df.at[idx, "flushdraw"] = True
-            elif n_suits == 1:
-                suitedness = "MONOTONE"
-                df.at[idx, "flush"] = True
-
-            # Connectedness
-            connectedness = "DISCONNECTED"
-            has_ace = 14 in ranks
-            # Check for straights
-            if pairedness == "UNPAIRED":
-                if max(ranks) - min(ranks) < 5:
-                    connectedness = "STRAIGHT"
-                    df.at[idx, "straight"] = True
-                elif has_ace and max([r % 14 for r in ranks]) <= 5:
-                    connectedness = "STRAIGHT"
-                    df.at[idx, "straight"] = True
-                    # Check if is broadway straight or wheel straight
-                    if all([r >= 10 for r in ranks]):
-                        df.at[idx, "broadway"] = True
-                    if all([r <= 5 for r in modulo_ranks]):
-                        df.at[idx, "wheel"] = True
-
-            if connectedness == "DISCONNECTED":
-                straightdraw = False
-                # Else, check to see if straight draws are possible
-                unique_ranks = list(set(ranks))
-                if has_ace:
-                    unique_ranks.append(1)
-                unique_ranks.sort(reverse=True)
-                for i in range(len(unique_ranks) - 1):
-                    if connectedness == "OESD":  # We've already found an OESD
-                        break
-                    r1, r2 = unique_ranks[i : i + 2]
-                    if 0 < r1 - r2 <= 3:
-                        # If cards are close (e.g., 5h 8d), this makes for an
-                        # open ended straight draw EXCEPT for when one of the
-                        # cards is an ace
-                        if r1 == 14:
-                            connectedness = "GUTSHOT"
-                            df.at[idx, "broadwaydraw"] = True
-                            df.at[idx, "straightdraw"] = True
-                        if r2 == 1:
-                            connectedness = "GUTSHOT"
-                            df.at[idx, "wheeldraw"] = True
-                            df.at[idx, "straightdraw"] = True
-                        else:
-                            connectedness = "OESD"
-                            df.at[idx, "oesd"] = True
-                            df.at[idx, "gutshot"] = True
-                            df.at[idx, "straightdraw"] = True
-                    elif 0 < r1 - r2 == 4:
-                        connectedness = "GUTSHOT"
-                        df.at[idx, "gutshot"] = True
-                        df.at[idx, "straightdraw"] = True
-
-            df.at[idx, "pairedness"] = pairedness
-            df.at[idx, "suitedness"] = suitedness
-            df.at[idx, "connectedness"] = connectedness
-            df.at[idx, "ahml"] = ahml_label
-            df.at[idx, "high_card"] = high_card
-            df.at[idx, "texture"] = (
-                high_card,
-                pairedness,
-                suitedness,
-                connectedness,
-                ahml_label,
-            )
+        self._df = compute_textures(process_flops(self._df))
 
     def set_default_hidden_columns(self):
         columns_to_suppress = [
@@ -283,11 +345,12 @@ class Flops:
         return f"<Flops: filters=\"{','.join(self._current_filters)}\" ({len(self)} flops)>"
 
     def dump(self) -> str:
-        pd.set_option("display.max_rows", None)
-        pd.set_option("display.max_columns", None)
-        pd.set_option("display.width", 1000)
-        s = str(self.view())
-        pd.reset_option("display.max_rows")
-        pd.reset_option("display.max_columns")
-        pd.reset_option("display.width")
-        return s
+        with pd.option_context(
+            "display.max_rows",
+            None,
+            "display.max_columns",
+            None,
+            "display.width",
+            1000,
+        ):
+            return str(self.view())
@@ -1,19 +1,30 @@
 from typing import Dict, Optional, Tuple, List
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import os
+from hashlib import sha1
 from os import path as osp
-from io import StringIO
 from matplotlib.backend_bases import PickEvent, MouseEvent, MouseButton
 import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgba_array
 from matplotlib.lines import Line2D
-import mplcursors
 import webbrowser
 import tempfile
 import pydoc
 from pathlib import Path
 
-from ..util import ranks_rev, ahml
+from ..flops import (
+    process_flops,
+    compute_textures,
+    PAIREDNESS_DTYPE,
+    SUITEDNESS_DTYPE,
+    CONNECTEDNESS_DTYPE,
+)
 from .util import *
+from ..util import VisibleColumns
 from .database import (
     CFRDatabase,
     apply_permutation,
@@ -24,17 +35,141 @@ from .database import (
 plt.ion()
 
 
-def load_report_to_df(report_csv_path: str) -> Tuple[List[str], str, pd.DataFrame]:
+def is_numeric_report_column(column: str) -> bool:
+    """
+    Return True if `column` of a raw report holds numbers (frequencies,
+    equities, EVs and EQRs) rather than cards
+
+    >>> is_numeric_report_column("BET 300 freq"), is_numeric_report_column("Turn")
+    (True, False)
     """
-    Read in a report a return a (header, body, dataframe) tuple
+    return column == "Global %" or column.endswith((" freq", " Equity", " EV", " EQR"))
+
+
+def load_report_to_df(report_csv_path: str) -> Tuple[List[str], pd.DataFrame]:
+    """
+    Read in a report and return a (header, dataframe) tuple. The header is the
+    report's first three lines, and the report's final (summary) row is
+    dropped from the dataframe.
     """
     with open(report_csv_path) as f:
-        lines = f.readlines()
-    header = lines[:3]
-    body = StringIO("\n".join(lines[3:]))
-    df = pd.read_csv(body)
+        header = [f.readline() for _ in range(3)]
+        # Spell out the dtypes of the numeric columns rather than have the
+        # parser infer them. Board columns (Flop, Turn, ...) are left as is.
+        columns = f.readline().rstrip("\n").split(",")
+        dtypes = {c: np.float64 for c in columns if is_numeric_report_column(c)}
+        df = pd.read_csv(f, names=columns, header=None, engine="c", dtype=dtypes)
     df = df.drop(df.index[-1])
-    return header, body, df
+    return header, df
+
+
+# Processed report frames are cached here, keyed on the report's path and
+# modification time. Set to `None` to disable caching.
+REPORT_CACHE_DIRECTORY: Optional[str] = osp.join(CACHE_DIRECTORY, "reports")
+# Bump this whenever report processing changes to invalidate cached reports
+REPORT_CACHE_VERSION = 4
+# The number of processed reports kept in `REPORT_CACHE_DIRECTORY`. The least
+# recently used reports are deleted beyond this.
+MAX_CACHED_REPORT_FILES = 256
+
+# Plot colors of each (pairedness, suitedness, connectedness), indexed by the
+# texture columns' categorical codes
+_TEXTURE_COLOR_LUT = np.array(
+    [
+        [
+            [color_texture((p, s, c)) for c in CONNECTEDNESS_DTYPE.categories]
+            for s in SUITEDNESS_DTYPE.categories
+        ]
+        for p in PAIREDNESS_DTYPE.categories
+    ],
+    dtype=object,
+)
+# The same colors as RGBA values. Matplotlib takes these as they are, rather
+# than parsing a color string for every plotted flop.
+_TEXTURE_RGBA_LUT = to_rgba_array(_TEXTURE_COLOR_LUT.ravel()).reshape(
+    _TEXTURE_COLOR_LUT.shape + (4,)
+)
+
+# Frames with fewer rows than this are filtered with pandas' python engine:
+# numexpr's (when installed) per-expression compile cost dominates for them
+NUMEXPR_MIN_ROWS = 10_000
+# The number of filter masks each report keeps cached
+MAX_CACHED_FILTER_MASKS = 128
+# The number of processed report frames kept in memory. These are shared by
+# every `AggregationReport` in the process, so re-opening a report (e.g., in a
+# new tree of reports) doesn't reload it. Frames are large (tens of MB for
+# turn reports) and outlive their reports, so only a few are kept: the disk
+# cache covers the rest.
+MAX_CACHED_REPORTS = 4
+_processed_reports: OrderedDict[str, Tuple[List[str], pd.DataFrame]] = OrderedDict()
+
+
+def eval_filter(df: pd.DataFrame, query_string: str) -> pd.Series:
+    """
+    Evaluate a filter query over `df`, returning a boolean mask.
+    """
+    engine = "python" if len(df) < NUMEXPR_MIN_ROWS else None
+    return df.eval(query_string, engine=engine)
+
+
+def cached_filter_mask(
+    masks: OrderedDict,
+    filters: List[str],
+    view: pd.DataFrame,
+    query_string: str,
+) -> np.ndarray:
+    """
+    Evaluate `query_string` against `view`, the result of applying `filters`,
+    and return the resulting boolean mask over `view`'s rows.
+
+    Queries can use aggregates over the view (e.g., `ev > ev.mean()`), so
+    masks are cached in `masks` by the whole filter chain rather than by query
+    string alone. A cached mask is only reused if it covers the same rows as
+    `view`, which may have been sorted since.
+    """
+    key = tuple(filters) + (query_string,)
+    mask = masks.get(key)
+    if mask is not None and len(mask) == len(view):
+        masks.move_to_end(key)
+        if mask.index.equals(view.index):
+            return mask.to_numpy()
+        # The view was reordered (e.g., by `sort_by`)
+        mask = mask.reindex(view.index)
+        if not mask.isna().any():
+            return mask.to_numpy(dtype=bool)
+    mask = eval_filter(view, query_string)
+    if key not in masks and len(masks) >= MAX_CACHED_FILTER_MASKS:
+        # Evict the least recently used mask
+        masks.popitem(last=False)
+    masks[key] = mask
+    masks.move_to_end(key)
+    return mask.to_numpy()
+
+
+def find_matching_column(sorted_columns: List[str], column: str) -> Optional[str]:
+    """
+    Return `column` if it is in `sorted_columns`, or else the unique column
+    that `column` is a prefix of. Return `None` if there is no such column.
+
+    >>> find_matching_column(["eqr", "equity", "ev"], "ev")
+    'ev'
+    >>> find_matching_column(sorted(["bet_50", "check", "ev"]), "bet")
+    'bet_50'
+    """
+    if column is None or sorted_columns is None:
+        return None
+    lo = bisect_left(sorted_columns, column)
+    if lo < len(sorted_columns) and sorted_columns[lo] == column:
+        return column
+    # Every column with `column` as a prefix sorts between these two bounds
+    hi = bisect_left(sorted_columns, column + "\uffff", lo)
+    matches = sorted_columns[lo:hi]
+    if len(matches) == 1:
+        return matches[0]
+    elif len(matches) == 0:
+        return None
+    print(f"Column name {column} has multiple matches: {', '.join(matches)}")
+    return None
 
 
 class AggregationReport:
@@ -77,7 +212,14 @@ class AggregationReport:
         self._df = None
         self._view: pd.DataFrame = None
         self._current_filters = []
+        # The view before each of `self._current_filters` was applied
+        self._view_stack: List[pd.DataFrame] = []
+        # Boolean masks over filtered views, keyed by filter chain
+        self._filter_masks: OrderedDict[Tuple[str, ...], pd.Series] = OrderedDict()
         self.hidden_columns = []
+        self._visible_cols = VisibleColumns()
+        # All columns of `self._df`, sorted for prefix lookups
+        self._sorted_cols: List[str] = []
         self.texture_columns = []
         self.cfr_database = None
         if cfr_database is not None:
@@ -103,15 +245,65 @@ class AggregationReport:
 
     def _load_report(self):
         """
-        Load the dataframe from the raw csv passed in.
+        Load the dataframe from the raw csv passed in. The processed
+        dataframe is cached in memory and in `REPORT_CACHE_DIRECTORY`, so
+        reloading an unchanged report skips parsing and texture computation.
         """
-        self.header, self.body, self._df = load_report_to_df(self.report_csv_path)
-        self._clean_column_names()
-        self._process_flops()
-        self._compute_textures()
-        self._view = self._df.copy()
+        key = self._report_cache_key()
+        cached = _processed_reports.get(key)
+        if cached is not None:
+            # Processed frames are never modified in place, so reports of the
+            # same directory can share them
+            _processed_reports.move_to_end(key)
+            self.header, self._df = cached
+        else:
+            cache_file = self._report_cache_file(key)
+            if cache_file is not None:
+                cached = load_cached_pickle(cache_file)
+            if cached is not None:
+                self.header, self._df = cached
+            else:
+                self.header, self._df = load_report_to_df(self.report_csv_path)
+                self._clean_column_names()
+                self._process_flops()
+                self._compute_textures()
+                if cache_file is not None:
+                    try:
+                        dump_cached_pickle(cache_file, (self.header, self._df))
+                        prune_cache_directory(
+                            osp.dirname(cache_file), MAX_CACHED_REPORT_FILES
+                        )
+                    except OSError:
+                        # Caching is best effort: the report is still usable
+                        pass
+            if len(_processed_reports) >= MAX_CACHED_REPORTS:
+                # Evict the least recently used report
+                _processed_reports.popitem(last=False)
+            _processed_reports[key] = (self.header, self._df)
+        self._view = self._df
         return self._view
 
+    def _report_cache_key(self) -> str:
+        """
+        Identify this report's processed frame: the key changes whenever the
+        report is modified or report processing changes
+        """
+        csv_path = osp.abspath(self.report_csv_path)
+        key = ":".join(
+            [
+                str(REPORT_CACHE_VERSION),
+                csv_path,
+                str(osp.getmtime(csv_path)),
+                str(osp.getmtime(self.report_info_path)),
+            ]
+        )
+        return sha1(key.encode()).hexdigest()
+
+    def _report_cache_file(self, key: str) -> Optional[str]:
+        if REPORT_CACHE_DIRECTORY is None:
+            return None
+        return osp.join(REPORT_CACHE_DIRECTORY, f"{key}.pkl")
+
     def view(self) -> pd.DataFrame:
         """
         There are some things we need to do before showing the view. For
@@ -122,17 +314,17 @@ class AggregationReport:
         leaving the actual view unchanged.
         """
 
-        result = self._view.copy()
-        to_drop = [c for c in self.hidden_columns if c in result]
-        result.drop(columns=to_drop, inplace=True)
-        return result
+        visible = self._visible_cols(self._df.columns, self.hidden_columns)
+        return self._view[visible]
 
     def reset(self, filter=None):
         """
         Reset the view, optionally with a new filter
         """
-        self._view = self._df.copy()
+        # The view is never modified in place, so it can share `self._df`
+        self._view = self._df
         self._current_filters = []
+        self._view_stack = []
         if filter:
             self.filter(filter)
         return self
@@ -155,7 +347,7 @@ class AggregationReport:
         """
         Sort the current view by columns
         """
-        self._view.sort_values(by=by, ascending=ascending, inplace=True)
+        self._view = self._view.sort_values(by=by, ascending=ascending)
         return self
 
     def filter(self, query_string):
@@ -170,22 +362,32 @@ class AggregationReport:
         ```
         r.filter("r1 == 14 and not flush and not straight and unpaired")
         ```
+
+        Queries use `DataFrame.eval` syntax: combine conditions with `and`,
+        `or` and `not` (or `&`, `|` and `~`), and quote strings, e.g.
+        `pairedness == 'PAIRED'`. Boolean columns such as `flush` can be used
+        directly as conditions.
         """
+        # Masks are cached by filter chain, so re-applying a filter (e.g., in
+        # `reset(filter=...)` or after `undo_filter`) doesn't re-evaluate it
+        mask = cached_filter_mask(
+            self._filter_masks, self._current_filters, self._view, query_string
+        )
         self._current_filters.append(query_string)
-        self._view.query(expr=query_string, inplace=True)
+        self._view_stack.append(self._view)
+        self._view = self._view[mask]
         return self
 
     def undo_filter(self, n=1):
         """
         Remove the last n filters from the view
         """
-        if n <= 0:
+        if n <= 0 or not self._view_stack:
             return
-        cf = self._current_filters[:-n]
-        self.reset()
-        for f in cf:
-            self.filter(f)
-        self._current_filters = cf
+        n = min(n, len(self._view_stack))
+        self._view = self._view_stack[-n]
+        del self._view_stack[-n:]
+        del self._current_filters[-n:]
 
     def all_columns(self):
         """
@@ -214,17 +416,16 @@ class AggregationReport:
         """
         Open the dataframe in a browser
         """
+        visible = self._visible_cols(self._df.columns, self.hidden_columns)
         with tempfile.NamedTemporaryFile("w", delete=False, suffix=".html") as f:
             url = "file://" + f.name
-            html = self.view().to_html()
-            f.write(html)
+            self._view.to_html(buf=f, columns=visible)
         webbrowser.open(url)
 
     def describe(self, cols=None):
-        v = self.view()
-        if cols is not None:
-            v = v[cols]
-        return v.describe()
+        if cols is None:
+            cols = self._visible_cols(self._df.columns, self.hidden_columns)
+        return self._view[cols].describe()
 
     def plot(
         self,
@@ -342,19 +543,11 @@ class AggregationReport:
                 raise RuntimeError(f"Cannot find {file} in report directory {d}")
 
     def _find_matching_column(self, columns, column):
-        if column in columns:
-            return column
-        if column is None:
-            return None
-        if columns is None:
-            return None
-        matches = [c for c in columns if c.startswith(column)]
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) == 0:
-            return None
-        print(f"Column name {column} has multiple matches: {', '.join(matches)}")
-        return None
+        """
+        Find the column in `columns` (which must be sorted) that is either
+        named `column` or is the only column starting with `column`
+        """
+        return find_matching_column(columns, column)
 
     def set_default_hidden_columns(self):
         other_player = "ip" if self.oop else "oop"
@@ -388,10 +581,10 @@ class AggregationReport:
             "wheel",
             "broadway",
         ]
-        for col in self.all_columns():
-            if col.startswith(other_player):
-                columns_to_suppress.append(col)
+        columns = self._df.columns
+        columns_to_suppress.extend(columns[columns.str.startswith(other_player)])
         self.hidden_columns = columns_to_suppress
+        self._sorted_cols = sorted(self._df.columns)
 
     def _load_info(self):
         with open(self.report_info_path) as f:
@@ -405,32 +598,38 @@ class AggregationReport:
             raise RuntimeError("Unknown Player", self.info.player)
 
     def _clean_column_names(self):
+        """
+        Normalize report column names: lower case, with our player's prefix
+        dropped from our columns (e.g., "OOP EV" -> "ev" for OOP), the " freq"
+        suffix dropped from action columns, and spaces replaced by underscores
+        """
         us = "ip" if self.ip else "oop"
-        new_names = {}
-        for column in self._df.columns:
-            new_name = column.lower()
-            if new_name.startswith(us + " "):
-                new_name = new_name[len(us) + 1 :].replace(" ", "_")
-                new_names[column] = new_name
-            elif new_name.endswith(" freq"):
-                new_name = new_name[:-5]
-            elif new_name == "global %":
-                new_name = "global_freq"
-            if " " in new_name:
-                new_name = new_name.replace(" ", "_")
-            new_names[column] = new_name.replace(" ", "_")
-        self._df.rename(columns=new_names, inplace=True)
+        cols = self._df.columns.str.lower()
+        ours = cols.str.startswith(us + " ")
+        cols = cols.str.slice(len(us) + 1).where(
+            ours, cols.str.replace(r" freq$", "", regex=True)
+        )
+        cols = cols.where(cols != "global %", "global_freq")
+        self._df.columns = cols.str.replace(" ", "_")
 
     def __getitem__(self, item):
         ranks, suits = board_to_ranks_suits(item)
-        v = self.view()
+        if len(ranks) != 3:
+            return None
+        r1, r2, r3 = [card_tuple(f"{r}{s}")[0] for (r, s) in zip(ranks, suits)]
+        # Narrow down to flops with matching ranks using the parsed rank
+        # columns, and then only compare suits against the few candidates
+        v = self._view
+        candidates = v[(v["r1"] == r1) & (v["r2"] == r2) & (v["r3"] == r3)]
+        candidate_suits = list(
+            zip(candidates["s1"], candidates["s2"], candidates["s3"])
+        )
         for permutation in ALL_SUIT_PERMUTATIONS:
             new_suits = apply_permutation(suits, permutation)
-            cards = [f"{r}{s}" for (r, s) in zip(ranks, new_suits)]
-            board = " ".join(cards)
-            result = v.loc[v["raw_flop"] == board]
-            if len(result) > 0:
-                return result
+            rows = [i for (i, s) in enumerate(candidate_suits) if s == new_suits]
+            if rows:
+                visible = self._visible_cols(self._df.columns, self.hidden_columns)
+                return candidates.iloc[rows][visible]
         return None
 
     def _process_flops(self):
@@ -439,166 +638,13 @@ class AggregationReport:
         once. This cleans up some data to ensure that flops are ordered
         correctly, ranks and suits are easily accessible, etc.
         """
-        df = self._df
-        df.rename(columns={"flop": "raw_flop"}, inplace=True)
-        flops_s = df["raw_flop"]
-        flops_t = []
-        rs1, rs2, rs3, ss1, ss2, ss3 = [], [], [], [], [], []
-        for flop in flops_s:
-            c1, c2, c3 = flop.split()
-            r1, s1 = card_tuple(c1)
-            r2, s2 = card_tuple(c2)
-            r3, s3 = card_tuple(c3)
-            rs1.append(r1)
-            ss1.append(s1)
-            rs2.append(r2)
-            ss2.append(s2)
-            rs3.append(r3)
-            ss3.append(s3)
-
-            flops_t.append(((r1, r2, r3), (s1, s2, s3)))
-
-        df["r1"] = rs1
-        df["r2"] = rs2
-        df["r3"] = rs3
-        df["s1"] = ss1
-        df["s2"] = ss2
-        df["s3"] = ss3
-        df["flop"] = flops_t
-        df.sort_values(by="flop", ascending=False, inplace=True)
-        df.reset_index(drop=True, inplace=True)
+        self._df = process_flops(self._df)
 
     def _compute_textures(self):
         """
         Compute texture columns
         """
-        df = self._df
-        df["pairedness"] = None
-        df["suitedness"] = None
-        df["connectedness"] = None
-        df["high_card"] = None
-        df["ahml"] = None
-
-        df["texture"] = None
-
-        df["flush"] = False
-        df["flushdraw"] = False
-        df["rainbow"] = False
-
-        df["straight"] = False
-        df["oesd"] = False
-        df["gutshot"] = False
-        df["straightdraw"] = False
-        df["disconnected"] = False
-        df["wheeldraw"] = False
-        df["broadwaydraw"] = False
-
-        df["toak"] = False
-        df["paired"] = False
-        df["unpaired"] = False
-
-        df["wheel"] = False
-        df["broadway"] = False
-
-        for idx, row in df.iterrows():
-            flop = row["flop"]
-            ranks, suits = flop
-            modulo_ranks = [r % 14 for r in ranks]
-
-            # High card
-            high_card = ranks_rev[max(ranks)] + "_high"
-
-            # AHML
-            ahml_label = "".join([ahml(r) for r in ranks])
-
-            # Pairedness
-            pairedness = None
-            n_ranks = len(set(ranks))
-            if n_ranks == 3:
-                pairedness = "UNPAIRED"
-                df.at[idx, "unpaired"] = True
-            elif n_ranks == 2:
-                pairedness = "PAIRED"
-                df.at[idx, "paired"] = True
-            elif n_ranks == 1:
-                pairedness = "TOAK"
-                df.at[idx, "toak"] = True
-
-            # Suitedness
-            suitedness = None
-            n_suits = len(set(suits))
-            if n_suits == 3:
-                suitedness = "RAINBOW"
-                df.at[idx, "rainbow"] = True
-            elif n_suits == 2:
-                suitedness = "FD"
-                df.at[idx, "flushdraw"] = True
-            elif n_suits == 1:
-                suitedness = "MONOTONE"
-                df.at[idx, "flush"] = True
-
-            # Connectedness
-            connectedness = "DISCONNECTED"
-            has_ace = 14 in ranks
-            # Check for straights
-            if pairedness == "UNPAIRED":
-                if max(ranks) - min(ranks) < 5:
-                    connectedness = "STRAIGHT"
-                    df.at[idx, "straight"] = True
-                elif has_ace and max([r % 14 for r in ranks]) <= 5:
-                    connectedness = "STRAIGHT"
-                    df.at[idx, "straight"] = True
-                    # Check if is broadway straight or wheel straight
-                    if all([r >= 10 for r in ranks]):
-                        df.at[idx, "broadway"] = True
-                    if all([r <= 5 for r in modulo_ranks]):
-                        df.at[idx, "wheel"] = True
-
-            if connectedness == "DISCONNECTED":
-                straightdraw = False
-                # Else, check to see if straight draws are possible
-                unique_ranks = list(set(ranks))
-                if has_ace:
-                    unique_ranks.append(1)
-                unique_ranks.sort(reverse=True)
-                for i in range(len(unique_ranks) - 1):
-                    if connectedness == "OESD":  # We've already found an OESD
-                        break
-                    r1, r2 = unique_ranks[i : i + 2]
-                    if 0 < r1 - r2 <= 3:
-                        # If cards are close (e.g., 5h 8d), this makes for an
-                        # open ended straight draw EXCEPT for when one of the
-                        # cards is an ace
-                        if r1 == 14:
-                            connectedness = "GUTSHOT"
-                            df.at[idx, "broadwaydraw"] = True
-                            df.at[idx, "straightdraw"] = True
-                        if r2 == 1:
-                            connectedness = "GUTSHOT"
-                            df.at[idx, "wheeldraw"] = True
-                            df.at[idx, "straightdraw"] = True
-                        else:
-                            connectedness = "OESD"
-                            df.at[idx, "oesd"] = True
-                            df.at[idx, "gutshot"] = True
-                            df.at[idx, "straightdraw"] = True
-                    elif 0 < r1 - r2 == 4:
-                        connectedness = "GUTSHOT"
-                        df.at[idx, "gutshot"] = True
-                        df.at[idx, "straightdraw"] = True
-
-            df.at[idx, "pairedness"] = pairedness
-            df.at[idx, "suitedness"] = suitedness
-            df.at[idx, "connectedness"] = connectedness
-            df.at[idx, "ahml"] = ahml_label
-            df.at[idx, "high_card"] = high_card
-            df.at[idx, "texture"] = (
-                high_card,
-                pairedness,
-                suitedness,
-                connectedness,
-                ahml_label,
-            )
+        self._df = compute_textures(self._df)
 
     def get_actions(self):
         columns = self._df.columns
@@ -635,19 +681,74 @@ class AggregationReport:
         return str(self)
 
     def dump(self) -> str:
-        pd.set_option("display.max_rows", None)
-        pd.set_option("display.max_columns", None)
-        pd.set_option("display.width", 1000)
-        s = str(self.view())
-        pd.reset_option("display.max_rows")
-        pd.reset_option("display.max_columns")
-        pd.reset_option("display.width")
-        return s
+        # `to_string` renders every row and column by default, so there is no
+        # need to touch (and then reset) the global display options
+        visible = self._visible_cols(self._df.columns, self.hidden_columns)
+        return self._view.to_string(columns=visible, line_width=1000)
 
     def paginate(self):
         pydoc.pager(self.dump())
 
 
+# Legend labels for the textures that `Plotter.scatter` colors flops by
+_LEGEND_TEXTURES = (
+    ("3 of a kind", ("TOAK", "RAINBOW", "DISCONNECTED")),
+    ("monotone disconneted", ("UNPAIRED", "MONOTONE", "DISCONNECTED")),
+    ("monotone connected", ("UNPAIRED", "MONOTONE", "STRAIGHT")),
+    ("monotone gutshot", ("UNPAIRED", "MONOTONE", "GUTSHOT")),
+    ("monotone oesd", ("UNPAIRED", "MONOTONE", "OESD")),
+    ("rainbow disconnected", ("UNPAIRED", "RAINBOW", "DISCONNECTED")),
+    ("rainbow connected", ("UNPAIRED", "RAINBOW", "STRAIGHT")),
+    ("rainbow oesd", ("UNPAIRED", "RAINBOW", "OESD")),
+    ("rainbow gutter", ("UNPAIRED", "RAINBOW", "GUTSHOT")),
+    ("flushdraw disconnected", ("UNPAIRED", "FD", "DISCONNECTED")),
+    ("flushdraw connected", ("UNPAIRED", "FD", "STRAIGHT")),
+    ("flushdraw oesd", ("UNPAIRED", "FD", "OESD")),
+    ("flushdraw gutter", ("UNPAIRED", "FD", "GUTSHOT")),
+    ("paired rainbow disconnected", ("PAIRED", "RAINBOW", "DISCONNECTED")),
+    ("paired rainbow oesd", ("PAIRED", "RAINBOW", "OESD")),
+    ("paired rainbow gutter", ("PAIRED", "RAINBOW", "GUTSHOT")),
+    ("paired flushdraw disconnected", ("PAIRED", "FD", "DISCONNECTED")),
+    ("paired flushdraw oesd", ("PAIRED", "FD", "OESD")),
+    ("paired flushdraw gutter", ("PAIRED", "FD", "GUTSHOT")),
+)
+
+
+@lru_cache(maxsize=1)
+def _legend_elements() -> List[Line2D]:
+    """
+    Legend handles for `_LEGEND_TEXTURES`. These never change, so they are
+    built once and shared by every plot.
+    """
+    return [
+        Line2D(
+            [0],
+            [0],
+            marker="o",
+            color="w",
+            label=label,
+            markerfacecolor=color_texture(t),
+            markersize=8,
+        )
+        for (label, t) in _LEGEND_TEXTURES
+    ]
+
+
+def texture_colors(df: pd.DataFrame, rgba=False) -> np.ndarray:
+    """
+    Return the plot color of each flop in `df`, a report or comparison frame,
+    by looking up its texture's categorical codes in `_TEXTURE_COLOR_LUT`. If
+    `rgba` is `True`, return an (n, 4) array of RGBA values instead of color
+    strings.
+    """
+    lut = _TEXTURE_RGBA_LUT if rgba else _TEXTURE_COLOR_LUT
+    return lut[
+        df["pairedness"].cat.codes.to_numpy(),
+        df["suitedness"].cat.codes.to_numpy(),
+        df["connectedness"].cat.codes.to_numpy(),
+    ]
+
+
 class Plotter:
     def __init__(self, report: AggregationReport):
         self.report: AggregationReport = report
@@ -695,10 +796,10 @@ class Plotter:
         If both columns are provided, plot col1 and col2 against each other.
         """
         report = self.report
-        v: pd.DataFrame = report._view.copy()
-        columns = list(v.columns)
-        col1 = report._find_matching_column(columns, col1)
-        col2 = report._find_matching_column(columns, col2)
+        # The view is only read (sorting rebinds `v`), so it isn't copied
+        v: pd.DataFrame = report._view
+        col1 = report._find_matching_column(report._sorted_cols, col1)
+        col2 = report._find_matching_column(report._sorted_cols, col2)
         values1 = None
         values2 = None
 
@@ -731,18 +832,18 @@ class Plotter:
         # None, etc)
         if col1 is not None and col2 is None:
             if sort_single_column:
-                v.sort_values(by=col1, ascending=True, inplace=True)
-            values2 = v[col1]
-            values1 = list(range(len(values2)))
+                v = v.sort_values(by=col1, ascending=True)
+            values2 = v[col1].to_numpy()
+            values1 = np.arange(len(values2))
             x_axis = "#"
             y_axis = col1
             if marker is None:
                 marker = "."
         elif col1 is None and col2 is not None:
             if sort_single_column:
-                v.sort_values(by=col2, ascending=True, inplace=True)
-            values2 = v[col2]
-            values1 = list(range(len(values2)))
+                v = v.sort_values(by=col2, ascending=True)
+            values2 = v[col2].to_numpy()
+            values1 = np.arange(len(values2))
             x_axis = "#"
             y_axis = col2
             if marker is None:
@@ -762,14 +863,14 @@ class Plotter:
                 if "check" not in actions:
                     raise RuntimeError(f"No valid actions in {actions}")
                 col2 = "check"
-            values1 = v[col1]
-            values2 = v[col2]
+            values1 = v[col1].to_numpy()
+            values2 = v[col2].to_numpy()
             x_axis = col1
             y_axis = col2
 
         else:
-            values1 = v[col1]
-            values2 = v[col2]
+            values1 = v[col1].to_numpy()
+            values2 = v[col2].to_numpy()
             x_axis = col1
             y_axis = col2
 
@@ -781,16 +882,12 @@ class Plotter:
 
         fig, ax = plt.subplots()
         fig.set_size_inches(*plot_size_inches)
-        colors = [color_texture(texture) for texture in v["texture"]]
-        sizes = [
-            marker_size_from_high_card(flop, max_size=max_size)
-            for flop in v["raw_flop"]
-        ]
+        colors = texture_colors(v, rgba=True)
+        sizes = marker_sizes_from_high_cards(v["r1"].to_numpy(), max_size=max_size)
         scatter = ax.scatter(
             values1,
             values2,
             c=colors,
-            label=v["raw_flop"],
             s=sizes,
             marker=marker,
             edgecolors="black",
@@ -805,50 +902,17 @@ class Plotter:
             pt = max(min(ax.get_xlim()), min(ax.get_ylim()))
             ax.axline((pt, pt), slope=1)
 
-        all_textures = [
-            ("3 of a kind", ("TOAK", "RAINBOW", "DISCONNECTED")),
-            ("monotone disconneted", ("UNPAIRED", "MONOTONE", "DISCONNECTED")),
-            ("monotone connected", ("UNPAIRED", "MONOTONE", "STRAIGHT")),
-            ("monotone gutshot", ("UNPAIRED", "MONOTONE", "GUTSHOT")),
-            ("monotone oesd", ("UNPAIRED", "MONOTONE", "OESD")),
-            ("rainbow disconnected", ("UNPAIRED", "RAINBOW", "DISCONNECTED")),
-            ("rainbow connected", ("UNPAIRED", "RAINBOW", "STRAIGHT")),
-            ("rainbow oesd", ("UNPAIRED", "RAINBOW", "OESD")),
-            ("rainbow gutter", ("UNPAIRED", "RAINBOW", "GUTSHOT")),
-            ("flushdraw disconnected", ("UNPAIRED", "FD", "DISCONNECTED")),
-            ("flushdraw connected", ("UNPAIRED", "FD", "STRAIGHT")),
-            ("flushdraw oesd", ("UNPAIRED", "FD", "OESD")),
-            ("flushdraw gutter", ("UNPAIRED", "FD", "GUTSHOT")),
-            ("paired rainbow disconnected", ("PAIRED", "RAINBOW", "DISCONNECTED")),
-            ("paired rainbow oesd", ("PAIRED", "RAINBOW", "OESD")),
-            ("paired rainbow gutter", ("PAIRED", "RAINBOW", "GUTSHOT")),
-            ("paired flushdraw disconnected", ("PAIRED", "FD", "DISCONNECTED")),
-            ("paired flushdraw oesd", ("PAIRED", "FD", "OESD")),
-            ("paired flushdraw gutter", ("PAIRED", "FD", "GUTSHOT")),
-        ]
-
-        legend_elements = [
-            Line2D(
-                [0],
-                [0],
-                marker="o",
-                color="w",
-                label=label,
-                markerfacecolor=color_texture(t),
-                markersize=8,
-            )
-            for (label, t) in all_textures
-        ]
         # Add the legend
         if legend:
             ax.legend(
-                handles=legend_elements, loc="upper left", prop={"size": legend_size}
+                handles=_legend_elements(),
+                loc="upper left",
+                prop={"size": legend_size},
             )
 
         self.data_point_labels = tuple(v["raw_flop"])
-        mplcursors.cursor(ax.collections, hover=True).connect(
-            "add",
-            lambda sel: sel.annotation.set_text(v["raw_flop"].iloc[sel.index]),
+        fig.canvas.mpl_connect(
+            "motion_notify_event", self._make_on_hover_callback(ax, scatter)
         )
         ax.set_xlabel(x_axis, fontsize=15)
         ax.set_ylabel(y_axis, fontsize=15)
@@ -863,6 +927,38 @@ class Plotter:
         scatter.set_picker(True)
         plt.show()
 
+    def _make_on_hover_callback(self, ax, scatter):
+        """
+        Show the flop under the mouse in a single annotation. Hit testing is
+        done by the scatter collection itself, over all of its points at once.
+        """
+        labels = self.data_point_labels
+        offsets = scatter.get_offsets()
+        annotation = ax.annotate(
+            "",
+            xy=(0, 0),
+            xytext=(10, 10),
+            textcoords="offset points",
+            bbox={"boxstyle": "round", "fc": "w"},
+            visible=False,
+        )
+
+        def on_hover(event: MouseEvent):
+            if event.inaxes is not ax:
+                return
+            hit, info = scatter.contains(event)
+            if hit:
+                i = info["ind"][0]
+                annotation.xy = offsets[i]
+                annotation.set_text(labels[i])
+                annotation.set_visible(True)
+                ax.figure.canvas.draw_idle()
+            elif annotation.get_visible():
+                annotation.set_visible(False)
+                ax.figure.canvas.draw_idle()
+
+        return on_hover
+
     def _make_on_pick_callback(self):
         labels = self.data_point_labels
 
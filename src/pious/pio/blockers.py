@@ -2,7 +2,9 @@
 A module for computing various blocker effects
 """
 
-from typing import Optional
+import sys
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
 from .solver import Node, Solver
 from .equity import EquityCalculator
 from ..util import (
@@ -54,22 +56,19 @@ def compute_single_card_blocker_effects(
 
     base_villain_equity2 = sum(equities * matchups) / sum(matchups)
 
-    equity_deltas = {}
+    # Compute the equity deltas for all cards at once: row `i` of
+    # `_CARD_MASKS` zeroes out every combo containing `CARDS[i]`
+    deltas = base_villain_equity2 - (_CARD_MASKS @ (equities * matchups)) / (
+        _CARD_MASKS @ matchups
+    )
+
     blocked_combos = {}
     histograms = {}
 
     for c in CARDS:
         indicator_array = get_card_index_array(c, negate=False)
-        mask_array = get_card_index_array(c, negate=True)
 
-        # First, compute individual equity deltas for this card
-        eqs = equities * mask_array
-        mus = matchups * mask_array
-        eq = sum(eqs * mus) / sum(mus)
-        diff = base_villain_equity2 - eq
-        equity_deltas[c] = diff
-
-        # Next, collect the blocked combos and their equities
+        # Collect the blocked combos and their equities
         blocked_combos[c] = [
             (PIO_HAND_ORDER[idx], equities[idx])
             for (idx, indicator) in enumerate(indicator_array)
@@ -89,13 +88,39 @@ def compute_single_card_blocker_effects(
         histograms[c] = hist
 
     return SingleCardBlockerEffects(
-        board, node_id, equity_deltas, blocked_combos, histograms
+        board, node_id, (np.array(CARDS), deltas), blocked_combos, histograms
     )
 
 
+# One row per card in `CARDS`, with a 0.0 for each combo containing that card
+_CARD_MASKS = np.stack([get_card_index_array(c, negate=True) for c in CARDS])
+
+
+def equity_deltas_as_arrays(equity_deltas) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert equity deltas (a dict of `card -> delta`, a list of
+    `(card, delta)` pairs, or a `(cards, deltas)` tuple of arrays) to a pair
+    of aligned arrays `(cards, deltas)`.
+    """
+    if isinstance(equity_deltas, tuple) and len(equity_deltas) == 2:
+        cards, deltas = equity_deltas
+        if isinstance(cards, np.ndarray):
+            return cards, np.asarray(deltas, dtype=np.float64)
+    if isinstance(equity_deltas, dict):
+        equity_deltas = list(equity_deltas.items())
+    cards = np.array([c for (c, _) in equity_deltas], dtype="<U2")
+    deltas = np.fromiter(
+        (d for (_, d) in equity_deltas), dtype=np.float64, count=len(equity_deltas)
+    )
+    return cards, deltas
+
+
 class SingleCardBlockerEffects:
     def __init__(self, board, node, equity_deltas, blocked_combos, histograms):
-        self.equity_deltas = equity_deltas
+        # Equity deltas are stored as aligned arrays of cards and deltas
+        self.cards, self.deltas = equity_deltas_as_arrays(equity_deltas)
+        # Sorted `(cards, deltas)`, keyed by `reverse`
+        self._sorted_equity_deltas: Dict[bool, Tuple[np.ndarray, np.ndarray]] = {}
         self.node = node
         self.blocked_combos = blocked_combos
         self.histograms = histograms
@@ -114,22 +139,42 @@ class SingleCardBlockerEffects:
             cards_to_print=cards_to_print,
         )
 
+    @property
+    def equity_deltas(self):
+        return dict(zip(self.cards.tolist(), self.deltas.tolist()))
+
+    def sorted_equity_deltas(self, reverse=False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return `(cards, deltas)` sorted from lowest to highest delta, or from
+        highest to lowest if `reverse` is True. Ties keep their original
+        relative order either way. Each order is computed once and shared by
+        the different views.
+        """
+        if reverse not in self._sorted_equity_deltas:
+            self._sorted_equity_deltas[reverse] = sort_equity_delta_arrays(
+                self.cards, self.deltas, reverse=reverse
+            )
+        return self._sorted_equity_deltas[reverse]
+
     def print_graph(self, height=20, print_suits=False):
+        cards, deltas = self.sorted_equity_deltas(reverse=True)
         print_equity_delta_graph(
-            list(self.equity_deltas.items()),
+            (cards, deltas),
             self.board,
             height=height,
             print_suits=print_suits,
+            presorted=True,
         )
 
     def print_grid(self, cell_width=7):
         print_blocker_effects_by_rank_suit(
-            list(self.equity_deltas.items()), cell_width=cell_width
+            zip(self.cards.tolist(), self.deltas.tolist()), cell_width=cell_width
         )
 
     def print_list(self, cols=4, use_same_scale=True):
+        cards, deltas = self.sorted_equity_deltas()
         print_blocker_effects_by_card(
-            sorted(list(self.equity_deltas.items()), key=lambda x: x[1]),
+            list(zip(cards.tolist(), deltas.tolist())),
             board=self.board,
             cols=cols,
             use_same_scale=use_same_scale,
@@ -139,6 +184,34 @@ class SingleCardBlockerEffects:
         self.print_histogram(card, width=width)
 
 
+def sort_equity_delta_arrays(
+    cards: np.ndarray, deltas: np.ndarray, board=None, reverse=False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sort aligned `cards` and `deltas` arrays by delta, optionally removing
+    any cards in `board`.
+
+    Ties keep their original relative order, as with `sorted`.
+    """
+    order = np.argsort(-deltas if reverse else deltas, kind="stable")
+    if board:
+        order = order[~np.isin(cards[order], list(board))]
+    return cards[order], deltas[order]
+
+
+def sort_equity_deltas(equity_deltas, board=None, reverse=False):
+    """
+    Sort a dict of `card -> equity delta` by equity delta, optionally removing
+    any cards in `board`, and return a list of `(card, delta)` pairs.
+
+    Ties keep their original relative order, as with `sorted`.
+    """
+    cards, deltas = sort_equity_delta_arrays(
+        *equity_deltas_as_arrays(equity_deltas), board=board, reverse=reverse
+    )
+    return list(zip(cards.tolist(), deltas.tolist()))
+
+
 def linear_color_gradient(
     v, min=0.0, max=1.0, left=(255, 0, 0), right=(0, 255, 0), bg=False
 ):
@@ -156,10 +229,38 @@ def linear_color_gradient(
     return rgb
 
 
+def linear_color_gradient_batch(
+    values, min=0.0, max=1.0, left=(255, 0, 0), right=(0, 255, 0), bg=False
+) -> List[str]:
+    """
+    Vectorized version of `linear_color_gradient`: compute the gradient color
+    for every value in `values` at once and return a list of ANSI codes, one
+    per value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    max_n = max - min
+    if max_n == 0:
+        v_n = np.zeros_like(values)
+    else:
+        v_n = np.clip((values - min) / max_n, 0.0, 1.0)
+    rgbs = (1 - v_n)[:, None] * np.asarray(left, dtype=np.float64) + v_n[
+        :, None
+    ] * np.asarray(right, dtype=np.float64)
+    return [rgb256(r, g, b, bg=bg) for (r, g, b) in rgbs.tolist()]
+
+
 def color_combo(c):
     return f"{color_card(c[:2], True)}{color_card(c[2:], True)}"
 
 
+def _write_lines(lines: List[str]):
+    """
+    Write `lines` to stdout with a single call rather than one `print` per
+    line.
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
 HORIZONTAL = "─"
 VERTICAL = "│"
 TOP_LEFT = "┌"
@@ -207,39 +308,40 @@ def print_card_banner(
     lines = s.split("\n")
     l = len(lines[0])
     right_padding = (66 - len(lines[0])) // 2
-    for line in lines:
-        print(" " * right_padding + line)
+    _write_lines([" " * right_padding + line for line in lines])
 
 
 def print_combo_equities(combos, width=3):
+    out = []
     i = 0
     row = []
     NUM_CHARS_IN_ROW = 11 * width
-    print(TOP_LEFT + HORIZONTAL * NUM_CHARS_IN_ROW + TOP_RIGHT)
-    print(f"{VERTICAL}{'BLOCKED COMBO EQUITIES':^{NUM_CHARS_IN_ROW}}{VERTICAL}")
-    print(f"{VERTICAL}{'':^{NUM_CHARS_IN_ROW}}{VERTICAL}")
-    for combo, combo_equity in combos:
+    out.append(TOP_LEFT + HORIZONTAL * NUM_CHARS_IN_ROW + TOP_RIGHT)
+    out.append(f"{VERTICAL}{'BLOCKED COMBO EQUITIES':^{NUM_CHARS_IN_ROW}}{VERTICAL}")
+    out.append(f"{VERTICAL}{'':^{NUM_CHARS_IN_ROW}}{VERTICAL}")
+    colors = linear_color_gradient_batch([e for (_, e) in combos], 0.0, 1.0)
+    for (combo, combo_equity), color in zip(combos, colors):
         i += 1
-        row.append(
-            f"{color_combo(combo)}: {linear_color_gradient(combo_equity, 0.0, 1.0)}{combo_equity:4.2f}{reset} "
-        )
+        row.append(f"{color_combo(combo)}: {color}{combo_equity:4.2f}{reset} ")
         if i % width == 0:
-            print(f'{VERTICAL} {"  ".join(row)} {VERTICAL}')
+            out.append(f'{VERTICAL} {"  ".join(row)} {VERTICAL}')
             row = []
     if len(row) > 0:
-        print(
+        out.append(
             f'{VERTICAL} {"  ".join(row)}{" " * (NUM_CHARS_IN_ROW - 11 * len(row))} {VERTICAL}'
         )
-    print(BOTTOM_LEFT + HORIZONTAL * NUM_CHARS_IN_ROW + BOTTOM_RIGHT)
+    out.append(BOTTOM_LEFT + HORIZONTAL * NUM_CHARS_IN_ROW + BOTTOM_RIGHT)
+    _write_lines(out)
 
 
 def print_histogram(hist, width=40):
+    hist = np.asarray(hist, dtype=np.float64)
     N = len(hist)
-    total = sum(hist)
+    total = hist.sum()
     if total < 0.0001:
         return
+    out = []
     y_delta = 100.0 / N
-    bin_bound = 0.0
     HISTOGRAM_CHAR_WIDTH = (
         5
         + 3
@@ -247,43 +349,60 @@ def print_histogram(hist, width=40):
         + 9
         + 2  # ' 10.0' \  # '%: '  # '**********'  # '( 39.92%)'  # $BORDERS
     )
-    print(TOP_LEFT + HORIZONTAL * HISTOGRAM_CHAR_WIDTH + TOP_RIGHT)
-    print(f"{VERTICAL}{'EQUITY_HISTOGRAM':^{HISTOGRAM_CHAR_WIDTH}}{VERTICAL}")
-    print(f"{VERTICAL}{'':^{HISTOGRAM_CHAR_WIDTH}}{VERTICAL}")
-    for row_idx in range(N):
-        row_color = linear_color_gradient(
-            bin_bound, 0.0, 90.0, (255, 0, 0), (0, 250, 0)
-        )
-        percent = hist[row_idx] / total
-        n_chars = int(width * hist[row_idx] / total)
-        row = f"{'█' * n_chars:{width}}"
-        print(
-            f"{VERTICAL}{row_color}{bin_bound:5.1f}%: {row}  {reset}({percent * 100.0:6.2f}%){VERTICAL}"
+    out.append(TOP_LEFT + HORIZONTAL * HISTOGRAM_CHAR_WIDTH + TOP_RIGHT)
+    out.append(f"{VERTICAL}{'EQUITY_HISTOGRAM':^{HISTOGRAM_CHAR_WIDTH}}{VERTICAL}")
+    out.append(f"{VERTICAL}{'':^{HISTOGRAM_CHAR_WIDTH}}{VERTICAL}")
+    bin_bounds = np.arange(N) * y_delta
+    row_colors = linear_color_gradient_batch(
+        bin_bounds, 0.0, 90.0, (255, 0, 0), (0, 250, 0)
+    )
+    percents = (hist / total * 100.0).tolist()
+    n_chars = (width * hist / total).astype(np.int64).tolist()
+    for row_color, bin_bound, percent, n in zip(
+        row_colors, bin_bounds.tolist(), percents, n_chars
+    ):
+        row = f"{'█' * n:{width}}"
+        out.append(
+            f"{VERTICAL}{row_color}{bin_bound:5.1f}%: {row}  {reset}({percent:6.2f}%){VERTICAL}"
         )
-        bin_bound += y_delta
-    print(BOTTOM_LEFT + HORIZONTAL * HISTOGRAM_CHAR_WIDTH + BOTTOM_RIGHT)
+    out.append(BOTTOM_LEFT + HORIZONTAL * HISTOGRAM_CHAR_WIDTH + BOTTOM_RIGHT)
+    _write_lines(out)
 
 
-def print_equity_delta_graph(equity_deltas, board, height=20, print_suits=False):
-    equity_deltas = sorted(equity_deltas, key=lambda x: x[1], reverse=True)
-    equity_deltas = [
-        (combo, delta) for (combo, delta) in equity_deltas if combo not in board
-    ]
-    combos, deltas = zip(*equity_deltas)
-    min_delta, max_delta = min(deltas), max(deltas)
+def print_equity_delta_graph(
+    equity_deltas, board, height=20, print_suits=False, presorted=False
+):
+    """
+    Print a graph of equity deltas from highest to lowest. If `presorted` is
+    True then `equity_deltas` is assumed to already be sorted from highest to
+    lowest, and only the board cards are removed.
+    """
+    out = []
+    combos, deltas = equity_deltas_as_arrays(equity_deltas)
+    if presorted:
+        not_board = ~np.isin(combos, list(board))
+        combos, deltas = combos[not_board], deltas[not_board]
+    else:
+        combos, deltas = sort_equity_delta_arrays(
+            combos, deltas, board=board, reverse=True
+        )
+    min_delta, max_delta = deltas.min(), deltas.max()
     delta_delta = max_delta - min_delta
-    graph_height = [
-        int(min(height * (d - min_delta) / delta_delta, height)) for d in deltas
-    ]
+    graph_height = (
+        np.minimum(height * (deltas - min_delta) / delta_delta, height)
+        .astype(np.int64)
+        .tolist()
+    )
     i = 0
     rows = []
     LAST_HEIGHT_DRAWN = height
+    height_colors = linear_color_gradient_batch(np.arange(height + 1), 0, height)
     for h in range(height, -1, -1):
         if print_suits:
             row = [" " * 2 * i]
         else:
             row = [" " * 1 * i]
-        rgb = linear_color_gradient(h, 0, height)
+        rgb = height_colors[h]
         drawn = False
         while i < len(graph_height) and graph_height[i] == h:
             if LAST_HEIGHT_DRAWN == h:
@@ -307,22 +426,26 @@ def print_equity_delta_graph(equity_deltas, board, height=20, print_suits=False)
 
     delta_bin = max_delta
     delta_incr = delta_delta / height
-    for row in rows:
-        rgb = linear_color_gradient(delta_bin, min_delta, max_delta)
+    delta_colors = linear_color_gradient_batch(
+        max_delta - np.arange(len(rows)) * delta_incr, min_delta, max_delta
+    )
+    for row, rgb in zip(rows, delta_colors):
         prefix = f"{delta_bin*100:6.2f}"
         prefix = f"{rgb}{prefix}{reset} {VERTICAL}"  # Length is 9
-        print(f"{prefix}{row}")
+        out.append(f"{prefix}{row}")
         delta_bin -= delta_incr
     if print_suits:
-        print(f"       {BOTTOM_LEFT}{HORIZONTAL*2*len(deltas)}")
+        out.append(f"       {BOTTOM_LEFT}{HORIZONTAL*2*len(deltas)}")
     else:
-        print(f"       {BOTTOM_LEFT}{HORIZONTAL*1*len(deltas)}")
-    print(
-        f"        {''.join(color_card(c, not print_suits) for c in combos if c not in board)}"
+        out.append(f"       {BOTTOM_LEFT}{HORIZONTAL*1*len(deltas)}")
+    out.append(
+        f"        {''.join(color_card(c, not print_suits) for c in combos.tolist())}"
     )
+    _write_lines(out)
 
 
 def print_blocker_effects_by_rank_suit(equity_deltas, cell_width=7):
+    out = []
     delta_lookup = {c: delta for (c, delta) in equity_deltas}
     deltas = list(delta_lookup.values())
     max_delta = max(deltas)
@@ -346,10 +469,10 @@ def print_blocker_effects_by_rank_suit(equity_deltas, cell_width=7):
         f"{LEFT_T}{HOR_SEG}{CROSS}{HOR_SEG}{CROSS}{HOR_SEG}{CROSS}{HOR_SEG}{RIGHT_T}"
     )
     BOT_HOR_LINE = f"{BOTTOM_LEFT}{HOR_SEG}{BOTTOM_T}{HOR_SEG}{BOTTOM_T}{HOR_SEG}{BOTTOM_T}{HOR_SEG}{BOTTOM_RIGHT}"
-    print(
+    out.append(
         f"     {color_suit('s', width=cell_width)} {color_suit('h', width=cell_width)} {color_suit('d', width=cell_width)} {color_suit('c', width=cell_width)} "
     )
-    print(f"    {TOP_HOR_LINE}")
+    out.append(f"    {TOP_HOR_LINE}")
     for i, row in enumerate(rows):
         rank = row[0][0]
         EMPTY_ROW_LINE = f"       {VERTICAL}"
@@ -365,17 +488,19 @@ def print_blocker_effects_by_rank_suit(equity_deltas, cell_width=7):
                 delta_s = f"{color}{bold}{delta*100:^{cell_width}.1f}{reset}"
                 # print delta
                 DELTA_ROW_LINE += f"{delta_s}{VERTICAL}"
-        print(f"  {DELTA_ROW_LINE}")
+        out.append(f"  {DELTA_ROW_LINE}")
         if i < len(rows) - 1:
-            print(f"    {CENTER_HOR_LINE}")
-    print(f"    {BOT_HOR_LINE}")
+            out.append(f"    {CENTER_HOR_LINE}")
+    out.append(f"    {BOT_HOR_LINE}")
+    _write_lines(out)
 
 
 def print_per_card_data(histogram, board, blocked_combos, cards_to_print=None):
     if cards_to_print is None:
         cards_to_print = CARDS
+    board_set = frozenset(board)
     for c in histogram.keys():
-        if c in board:
+        if c in board_set:
             continue
         if c not in cards_to_print:
             continue
@@ -385,47 +510,69 @@ def print_per_card_data(histogram, board, blocked_combos, cards_to_print=None):
             continue
         print_card_banner(c, board)
         print_histogram(hist, width=47)
-        combos.sort(key=lambda x: x[1], reverse=True)
+        combos.sort(key=itemgetter(1), reverse=True)
         print_combo_equities(combos, width=6)
 
 
+# Precomputed ANSI codes for the red and green gradients used by
+# `color_effect`, indexed by the quantized scale (0-255)
+_RED_TABLE = tuple(rgb256(255, s, s) for s in range(256))
+_GREEN_TABLE = tuple(rgb256(s, 255, s) for s in range(256))
+
+
+def _effect_scale(e, bound):
+    return min(max(int((1 - e / bound) * 255), 0), 255)
+
+
 def color_effect(e, s, min_effect, max_effect):
     if e < 0:
         # linear gradient along (255, 0, 0) and (255, 255, 255)
-        scale = int((1 - e / min_effect) * 255)
-        rgb = rgb256(255, scale, scale)
+        rgb = _RED_TABLE[_effect_scale(e, min_effect)]
     elif e > 0:
         # linear gradient along (0, 255, 0) and (255, 255, 255)
-        scale = int((1 - e / max_effect) * 255)
-        rgb = rgb256(scale, 255, scale)
+        rgb = _GREEN_TABLE[_effect_scale(e, max_effect)]
     else:
-        rgb = rgb256(255, 255, 255)
-    msg = (rgb, s, reset)
-    return "".join([str(x) for x in msg])
+        rgb = _RED_TABLE[255]
+    return f"{rgb}{s}{reset}"
+
+
+def grid_schedule(n_items: int, cols: int) -> np.ndarray:
+    """
+    Lay out `n_items` items column-major in a grid with `cols` columns.
+    Returns a `(rows, cols)` int array of item indices, with `-1` marking
+    empty cells.
+
+    >>> grid_schedule(5, 2).tolist()
+    [[0, 3], [1, 4], [2, -1]]
+    """
+    n_rows = (n_items + cols - 1) // cols
+    schedule = np.arange(n_rows * cols).reshape(cols, n_rows).T
+    schedule[schedule >= n_items] = -1
+    return schedule
 
 
 def print_blocker_effects_by_card(equity_deltas, board, cols=4, use_same_scale=True):
-    sizes = [x[1] for x in equity_deltas]
-    min_effect = min(sizes)
-    max_effect = max(sizes)
-    abs_effect = max(abs(min_effect), abs(max_effect))
+    out = []
+    _, sizes = equity_deltas_as_arrays(equity_deltas)
+    min_effect = sizes.min()
+    max_effect = sizes.max()
+    abs_effect = np.abs(sizes).max()
     if use_same_scale:
         min_effect = -abs_effect
         max_effect = abs_effect
 
+    board_set = frozenset(board)
     rows = []
-    N = (len(equity_deltas) + cols - 1) // cols
-    for i in range(N):
+    for schedule_row in grid_schedule(len(equity_deltas), cols).tolist():
         row = []
         rows.append(row)
-        for j in range(cols):
-            idx = i + j * N
-            if idx >= len(equity_deltas):
+        for idx in schedule_row:
+            if idx < 0:
                 continue
-            card, block_effect = equity_deltas[i + j * N]
+            card, block_effect = equity_deltas[idx]
             e = block_effect
 
-            if card in board:
+            if card in board_set:
                 s = f"{' ':6}"
                 entry = f" {crossed_out(color_card(card,True))}  {s} "
             else:
@@ -435,5 +582,6 @@ def print_blocker_effects_by_card(equity_deltas, board, cols=4, use_same_scale=T
             row.append(entry)
 
     for row in rows:
-        print("      " + "      ".join(row))
-    print()
+        out.append("      " + "      ".join(row))
+    out.append("")
+    _write_lines(out)
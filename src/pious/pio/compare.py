@@ -3,9 +3,16 @@ Compare different combination reports. This effectively performs a join on two
 aggregation reports.
 """
 
-from .aggregation import AggregationReport, Plotter
+from .aggregation import (
+    AggregationReport,
+    Plotter,
+    cached_filter_mask,
+    find_matching_column,
+)
+from ..util import VisibleColumns
+from collections import OrderedDict
 import pandas as pd
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 
 
 class AggregationComparator:
@@ -15,13 +22,17 @@ class AggregationComparator:
         report2: AggregationReport,
         lsuffix="_1",
         rsuffix="_2",
-        join_type="left",
+        join_type="inner",
         compared_columns=None,
         join_on=None,
     ):
         """
         Create a comparison of two different aggregation reports. Under the
         hood this joins the reports on the "raw_flop" column, comparing evs.
+
+        `join_type` is passed to `DataFrame.join` as `how`: by default only
+        flops in both reports are compared, while e.g. `"left"` keeps every
+        flop in `report1`, with missing values for flops not in `report2`.
         """
         # Defaults
         if compared_columns is None:
@@ -43,25 +54,56 @@ class AggregationComparator:
 
         # We want to compute the join of these columns, this is a bit of logic
         # to do it
-        all_actions = report1.get_actions() + report2.get_actions()
-        remaining_cols = []
-        to_exclude = join_on + compared_columns + all_actions
-        for c in report1._df.columns:
-            if c in to_exclude:
-                continue
-            remaining_cols.append(c)
-
-        r1_projection = report1._df[join_on + compared_columns]
+        to_exclude = (
+            set(join_on)
+            | set(compared_columns)
+            | set(report1.get_actions())
+            | set(report2.get_actions())
+        )
+        remaining_cols = [c for c in report1._df.columns if c not in to_exclude]
+
+        # The textures come from the same frame as r1's projection, so we
+        # attach them before joining and only need a single, index-aligned join
+        r1_projection = report1._df[join_on + compared_columns + remaining_cols]
         r2_projection = report2._df[join_on + compared_columns]
-        textures = report1._df[join_on + remaining_cols]
-        df = pd.merge(
-            r1_projection, r2_projection, on=join_on, suffixes=(lsuffix, rsuffix)
+
+        # Factorize the keys against a shared (sorted) set of categories so the
+        # join compares integer codes rather than strings
+        for key in join_on:
+            categories = pd.Index(
+                pd.unique(pd.concat([r1_projection[key], r2_projection[key]]))
+            ).sort_values()
+            r1_projection = r1_projection.assign(
+                **{key: pd.Categorical(r1_projection[key], categories=categories)}
+            )
+            r2_projection = r2_projection.assign(
+                **{key: pd.Categorical(r2_projection[key], categories=categories)}
+            )
+
+        df = r1_projection.set_index(join_on).join(
+            r2_projection.set_index(join_on),
+            how=join_type,
+            lsuffix=lsuffix,
+            rsuffix=rsuffix,
+            validate="one_to_one",
         )
-        df = pd.merge(df, textures, on="raw_flop")
+        df = df.reset_index()[
+            join_on
+            + [c + lsuffix for c in compared_columns]
+            + [c + rsuffix for c in compared_columns]
+            + remaining_cols
+        ]
         self._df: pd.DataFrame = df
-        self._view: pd.DataFrame = df.copy()
+        self._view: pd.DataFrame = df
         self._current_filters = []
+        # The view before each of `self._current_filters` was applied
+        self._view_stack: List[pd.DataFrame] = []
+        # Boolean masks over filtered views, keyed by filter chain
+        self._filter_masks: OrderedDict[Tuple[str, ...], pd.Series] = OrderedDict()
         self.hidden_columns = []
+        self._visible_cols = VisibleColumns()
+        # All columns of `self._df`, sorted for prefix lookups
+        self._sorted_cols: List[str] = []
         self.texture_columns = []
         self.plotter = Plotter(self)
         self.set_default_hidden_columns()
@@ -77,17 +119,17 @@ class AggregationComparator:
         leaving the actual view unchanged.
         """
 
-        result = self._view.copy()
-        to_drop = [c for c in self.hidden_columns if c in result]
-        result.drop(columns=to_drop, inplace=True)
-        return result
+        visible = self._visible_cols(self._df.columns, self.hidden_columns)
+        return self._view[visible]
 
     def reset(self):
         """
         Reset the view
         """
-        self._view = self._df.copy()
+        # The view is never modified in place, so it can share `self._df`
+        self._view = self._df
         self._current_filters = []
+        self._view_stack = []
         return self
 
     def filters(self, join: Optional[str | bool] = None, parens=True):
@@ -108,7 +150,7 @@ class AggregationComparator:
         """
         Sort the current view by columns
         """
-        self._view.sort_values(by=by, ascending=ascending, inplace=True)
+        self._view = self._view.sort_values(by=by, ascending=ascending)
         return self
 
     def filter(self, query_string):
@@ -123,22 +165,30 @@ class AggregationComparator:
         ```
         r.filter("r1 == 14 and not flush and not straight and unpaired")
         ```
+
+        Queries use `DataFrame.eval` syntax: combine conditions with `and`,
+        `or` and `not` (or `&`, `|` and `~`), and quote strings, e.g.
+        `pairedness == 'PAIRED'`. Boolean columns such as `flush` can be used
+        directly as conditions.
         """
+        mask = cached_filter_mask(
+            self._filter_masks, self._current_filters, self._view, query_string
+        )
         self._current_filters.append(query_string)
-        self._view.query(expr=query_string, inplace=True)
+        self._view_stack.append(self._view)
+        self._view = self._view[mask]
         return self
 
     def undo_filter(self, n=1):
         """
         Remove the last n filters from the view
         """
-        if n <= 0:
+        if n <= 0 or not self._view_stack:
             return
-        cf = self._current_filters[:-n]
-        self.reset()
-        for f in cf:
-            self.filter(f)
-        self._current_filters = cf
+        n = min(n, len(self._view_stack))
+        self._view = self._view_stack[-n]
+        del self._view_stack[-n:]
+        del self._current_filters[-n:]
 
     def all_columns(self):
         """
@@ -195,10 +245,10 @@ class AggregationComparator:
             "wheel",
             "broadway",
         ]
-        for col in self.all_columns():
-            if col.startswith(other_player):
-                columns_to_suppress.append(col)
+        columns = self._df.columns
+        columns_to_suppress.extend(columns[columns.str.startswith(other_player)])
         self.hidden_columns = columns_to_suppress
+        self._sorted_cols = sorted(self._df.columns)
 
     def plot(
         self,
@@ -245,16 +295,8 @@ class AggregationComparator:
             self.undo_filter()
 
     def _find_matching_column(self, columns, column):
-        if column in columns:
-            return column
-        if column is None:
-            return None
-        if columns is None:
-            return None
-        matches = [c for c in columns if c.startswith(column)]
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) == 0:
-            return None
-        print(f"Column name {column} has multiple matches: {', '.join(matches)}")
-        return None
+        """
+        Find the column in `columns` (which must be sorted) that is either
+        named `column` or is the only column starting with `column`
+        """
+        return find_matching_column(columns, column)
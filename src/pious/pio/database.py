@@ -1,18 +1,25 @@
 import os
 from os import path as osp
 import subprocess
+from array import array
 from itertools import permutations
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
 
 def board_to_ranks_suits(board) -> Tuple[Tuple[str], Tuple[str]]:
+    """
+    Split a board into its ranks and suits
+
+    >>> board_to_ranks_suits("As 9s 6h")
+    (('A', '9', '6'), ('s', 's', 'h'))
+    """
     b = board.replace(" ", "")
     if len(b) % 2 != 0:
-        if len(b) % 2 != 0:
-            raise RuntimeError(f"Invalid board name: {b}")
-    ranks = tuple(b[i] for i in range(0, len(b), 2))
-    suits = tuple(b[i + 1] for i in range(0, len(b), 2))
-    return ranks, suits
+        raise RuntimeError(f"Invalid board name: {b}")
+    return tuple(b[0::2]), tuple(b[1::2])
 
 
 def apply_permutation(suits: Tuple[str], perm: Tuple[str]) -> Tuple[str]:
@@ -22,6 +29,88 @@ def apply_permutation(suits: Tuple[str], perm: Tuple[str]) -> Tuple[str]:
 
 ALL_SUIT_PERMUTATIONS = list(permutations("shdc"))
 
+SUIT_CODES = {"s": 0, "h": 1, "d": 2, "c": 3}
+
+
+def suits_signature(suits: Tuple[str]) -> int:
+    """
+    Pack a sequence of suits into a small int, two bits per suit
+
+    >>> suits_signature(("s", "h", "d"))
+    36
+    """
+    sig = 0
+    for i, s in enumerate(suits):
+        sig |= SUIT_CODES[s] << (2 * i)
+    return sig
+
+
+def _build_flop_permutation_table() -> array:
+    """
+    Build a flat table mapping `perm_idx * 64 + sig` to the signature of the
+    three suits packed in `sig` after applying `ALL_SUIT_PERMUTATIONS[perm_idx]`
+    """
+    code_suits = {code: suit for (suit, code) in SUIT_CODES.items()}
+    table = array("H", [0]) * (len(ALL_SUIT_PERMUTATIONS) * 64)
+    for perm_idx, perm in enumerate(ALL_SUIT_PERMUTATIONS):
+        for sig in range(64):
+            suits = tuple(code_suits[(sig >> (2 * i)) & 3] for i in range(3))
+            table[perm_idx * 64 + sig] = suits_signature(apply_permutation(suits, perm))
+    return table
+
+
+FLOP_PERMUTATION_TABLE = _build_flop_permutation_table()
+# The same table as a (permutation, signature) array for batch lookups
+FLOP_PERMUTATION_ARRAY = np.frombuffer(FLOP_PERMUTATION_TABLE, dtype=np.uint16).reshape(
+    len(ALL_SUIT_PERMUTATIONS), 64
+)
+
+
+def permuted_signatures(suits: Tuple[str]) -> List[int]:
+    """
+    Return the signatures of `suits` under each of `ALL_SUIT_PERMUTATIONS`,
+    in order. Flops are looked up in `FLOP_PERMUTATION_TABLE`.
+
+    >>> permuted_signatures(("s", "h", "d"))[:3]
+    [52, 36, 56]
+    """
+    if len(suits) == 3:
+        sig = suits_signature(suits)
+        return [
+            FLOP_PERMUTATION_TABLE[perm_idx * 64 + sig]
+            for perm_idx in range(len(ALL_SUIT_PERMUTATIONS))
+        ]
+    return [
+        suits_signature(apply_permutation(suits, perm))
+        for perm in ALL_SUIT_PERMUTATIONS
+    ]
+
+
+# Maps ASCII suit characters to their SUIT_CODES value, and everything else to
+# an out-of-range code
+_SUIT_CODE_LUT = np.full(256, 4, dtype=np.uint8)
+for _suit, _code in SUIT_CODES.items():
+    _SUIT_CODE_LUT[ord(_suit)] = _code
+
+
+def flop_ranks_and_signatures(flops: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse a list of flops with no separating spaces (e.g., `"As9s6h"`) into an
+    array of rank bytes and an array of suit signatures in a single pass.
+
+    >>> ranks, sigs = flop_ranks_and_signatures(["As9s6h", "2c2s2d"])
+    >>> ranks.tolist(), sigs.tolist()
+    ([b'A96', b'222'], [16, 35])
+    """
+    buf = np.frombuffer("".join(flops).encode("ascii"), dtype=np.uint8)
+    buf = buf.reshape(-1, 6)
+    codes = _SUIT_CODE_LUT[buf[:, 1::2]].astype(np.uint32)
+    if (codes > 3).any():
+        raise RuntimeError(f"Invalid board name in {flops}")
+    ranks = np.ascontiguousarray(buf[:, 0::2]).view("S3").ravel()
+    sigs = (codes << np.array([0, 2, 4], dtype=np.uint32)).sum(axis=1)
+    return ranks, sigs.astype(np.uint32)
+
 
 def find_isomorphic_board(board_path: str, full_path=True) -> Optional[str]:
     board_path = osp.abspath(board_path)
@@ -54,28 +143,76 @@ class CFRDatabase:
         ]
         self.cfr_files = [osp.join(db_location, f) for f in self.cfr_file_names]
         self.boards = [b.split(".")[0] for b in self.cfr_file_names]
+        self.board_to_path = dict(zip(self.boards, self.cfr_files))
+
+        # Suit signatures are kept in lockstep with self.boards. Flop
+        # databases are parsed in bulk and their permuted signatures are
+        # gathered with a single table lookup.
+        if all(len(b) == 6 for b in self.boards):
+            ranks, self.board_sigs = flop_ranks_and_signatures(self.boards)
+            perm_sigs = FLOP_PERMUTATION_ARRAY[:, self.board_sigs].T.tolist()
+        else:
+            ranks_suits = [board_to_ranks_suits(b) for b in self.boards]
+            ranks = np.array(["".join(r).encode() for (r, _) in ranks_suits])
+            self.board_sigs = np.array(
+                [suits_signature(s) for (_, s) in ranks_suits], dtype=np.uint32
+            )
+            perm_sigs = [permuted_signatures(s) for (_, s) in ranks_suits]
 
         self.ranks_to_boards = {}
-        for b in self.boards:
-            ranks, suits = board_to_ranks_suits(b)
-            self.ranks_to_boards.setdefault(ranks, [])
-            self.ranks_to_boards[ranks].append(b)
+        # Maps (ranks, suit signature) to a stored board for every suit
+        # permutation of every stored board, so that isomorphic lookups are a
+        # single dict access
+        self.iso_index = {}
+        groups = pd.DataFrame({"ranks": ranks}).groupby("ranks", sort=False).indices
+        for r, idxs in groups.items():
+            r = tuple(r.decode())
+            self.ranks_to_boards[r] = [self.boards[i] for i in idxs]
+            for i in idxs:
+                for sig in perm_sigs[i]:
+                    self.iso_index.setdefault((r, sig), self.boards[i])
+
+        # The flop entries of the isomorphism index as a table, for batch
+        # lookups in `find_isomorphic_boards`
+        self.flop_iso_df = pd.DataFrame(
+            [
+                ("".join(r).encode(), sig, b)
+                for ((r, sig), b) in self.iso_index.items()
+                if len(r) == 3
+            ],
+            columns=["ranks", "sig", "board"],
+        )
 
     def find_isomorphic_board(self, board):
         """
         Look for a board in the database that is isomorphic to the provided flop
         """
         ranks, suits = board_to_ranks_suits(board)
-        possible_iso_boards = self.ranks_to_boards.get(ranks, [])
-        for b in possible_iso_boards:
-            _, s = board_to_ranks_suits(b)
-            for perm in ALL_SUIT_PERMUTATIONS:
-                if apply_permutation(suits, perm) == s:
-                    return b
+        b = self.iso_index.get((ranks, suits_signature(suits)))
+        if b is not None:
+            return b
         raise ValueError(
             f"Could not find isomorphic board to {board} in database at {self.db_location}"
         )
 
+    def find_isomorphic_boards(self, boards: List[str]) -> List[Optional[str]]:
+        """
+        Look up the isomorphic board in the database for each of `boards`,
+        returning `None` for boards that have no isomorphic board. Flops are
+        parsed in bulk and looked up with a single merge.
+        """
+        boards = [b.replace(" ", "") for b in boards]
+        if not all(len(b) == 6 for b in boards):
+            result = []
+            for board in boards:
+                ranks, suits = board_to_ranks_suits(board)
+                result.append(self.iso_index.get((ranks, suits_signature(suits))))
+            return result
+        ranks, sigs = flop_ranks_and_signatures(boards)
+        queries = pd.DataFrame({"ranks": ranks, "sig": sigs})
+        matches = queries.merge(self.flop_iso_df, on=["ranks", "sig"], how="left")
+        return [b if isinstance(b, str) else None for b in matches["board"]]
+
     def __getitem__(self, items):
         full_path = True
         if isinstance(items, tuple):
@@ -99,9 +236,7 @@ class CFRDatabase:
         Look for this board in the
         """
 
-        board = self[board, False]
-        idx = self.boards.index(board)
-        board_file_path = self.cfr_files[idx]
+        board_file_path = self.board_to_path[self[board, False]]
         if not osp.exists(board_file_path):
             raise RuntimeError(f"Board {board_file_path} does not exist")
         cmd = [self.pio_viewer_location, board_file_path, "--open-node", node]
@@ -212,24 +212,60 @@ class Line:
 
     """
 
+    __slots__ = (
+        "line_str",
+        "_starting_street",
+        "_is_terminal",
+        "_effective_stack",
+        "_money_in_per_street",
+        "actions",
+        "streets_as_actions",
+        "streets_as_lines",
+        "nodes",
+    )
+
     def __init__(self, line: str, starting_street=FLOP, effective_stack=None):
+        self._init(line, line.split(":"), starting_street, effective_stack)
+
+    def _init(self, line: str, actions: List[str], starting_street, effective_stack):
         self.line_str = line
         self._starting_street = starting_street
         self._is_terminal = False
         self._effective_stack = effective_stack
         self._money_in_per_street = [0, 0, 0, 0]
-        self.actions: List[str] = []
+        self.actions: List[str] = actions
         self.streets_as_actions: List[List[str]] = []
         self.streets_as_lines: List[str] = []
         self.nodes: Dict[Tuple[str], List[List[str]]] = {}
         self._setup(line)
 
+    @classmethod
+    def from_strings_bulk(
+        cls, lines: List[str], starting_street=FLOP, effective_stack=None
+    ) -> List["Line"]:
+        """
+        Create a `Line` for each line string in `lines`. This is equivalent to
+        `[Line(l, starting_street, effective_stack) for l in lines]` but
+        splits all lines into actions up front and skips per-line argument
+        handling, which adds up for trees with many thousands of lines.
+
+        >>> Line.from_strings_bulk(["r:0", "r:0:c", "r:0:c:b30"])
+        [Line(r:0), Line(r:0:c), Line(r:0:c:b30)]
+        """
+        tokens_list = [line.split(":") for line in lines]
+        result = []
+        new = cls.__new__
+        for line, actions in zip(lines, tokens_list):
+            obj = new(cls)
+            obj._init(line, actions, starting_street, effective_stack)
+            result.append(obj)
+        return result
+
     def _setup(self, line):
         """
-        Set up different views of this line by breaking it into actions and
-        grouping the actions by streets.
+        Set up different views of this line by grouping its actions by
+        streets.
         """
-        self.actions = line.split(":")
         _, self.streets_as_actions = actions_to_streets(
             self.actions,
             starting_street=self._starting_street,
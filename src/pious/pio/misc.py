@@ -1,5 +1,6 @@
 from pious.pio import Solver, Node
 import numpy as np
+from operator import itemgetter
 
 from pious.util import PIO_HAND_ORDER
 
@@ -77,7 +78,7 @@ def experiment():
     evs1 = s.calc_ev("IP", node_cbet)[0]
     deltas = evs1 - evs0
     deltas = np.nan_to_num(deltas, posinf=0.0, neginf=0.0)
-    hand_deltas = sorted(list(zip(PIO_HAND_ORDER, deltas)), key=lambda x: x[1])
+    hand_deltas = sorted(list(zip(PIO_HAND_ORDER, deltas)), key=itemgetter(1))
     for h, d in hand_deltas:
         print(f"{h}: {d:6.2f}")
     return deltas
@@ -1,4 +1,5 @@
 from typing import List
+from operator import itemgetter
 from os import path as osp
 
 from .script_builder import ScriptBuilder
@@ -88,7 +89,7 @@ def lock_overfold_at_node_id(
             for (i, e) in enumerate(evs)
             if player_range[i] > 0.0 and fold_freqs[i] < 1.0
         ],
-        key=lambda x: x[1],
+        key=itemgetter(1),
     )
 
     folded_combos = sum(a * b for (a, b) in zip(player_range, fold_freqs))
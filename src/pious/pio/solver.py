@@ -183,30 +183,30 @@ class Solver(object):
             raise ValueError(f"Could not find node_id {node_id}")
         return Node(data)
 
+    def has_node(self, node_id: str | Node) -> bool:
+        """
+        Return True if `node_id` is a node in the loaded tree. This probes the
+        node directly, so there is no need to `load_all_nodes()` and search
+        `show_all_lines()`.
+        """
+        if isinstance(node_id, Node):
+            node_id = node_id.node_id
+        data = self._run("show_node", node_id)
+        return "ERROR" not in data
+
     def show_children(self, node_id: str | Node) -> List[Node]:
         """
         Return a list of children of the given specified node.
         """
         if isinstance(node_id, Node):
             node_id = node_id.node_id
-        data = self._run("show_children", node_id)
-        if "ERROR" in data:
-            return []
-        if data.strip() == "":
-            return []
-        children_lines = data.split("\n\n")
-        children = []
-        # From the docs, each child entry is of the form:
-        # 'child n:' nodeID NODE_TYPE board pot children_no 'flags: f1 f2'
-        for child_line in children_lines:
-            items = child_line.split("\n")
-            node_data = items[1:]
-            child_node = Node("\n".join(node_data))
-            children.append(child_node)
-
-        return children
+        return _parse_children(self._run("show_children", node_id))
 
-    def show_children_actions(self, node_id: str | Node) -> List[str]:
+    def show_children_ids(self, node_id: str | Node) -> List[str]:
+        """
+        Return the node ids of the children of the given node, without
+        building a `Node` for each child.
+        """
         if isinstance(node_id, Node):
             node_id = node_id.node_id
         data = self._run("show_children", node_id)
@@ -215,7 +215,10 @@ class Solver(object):
         if data.strip() == "":
             return []
         children_lines = data.split("\n\n")
-        return [child.split("\n")[1].strip().split(":")[-1] for child in children_lines]
+        return [child.split("\n")[1].strip() for child in children_lines]
+
+    def show_children_actions(self, node_id: str | Node) -> List[str]:
+        return [child_id.split(":")[-1] for child_id in self.show_children_ids(node_id)]
 
     def show_hand_order(self):
         return self._run("show_hand_order").split(" ")
@@ -709,6 +712,27 @@ def is_member(hand, hand_class):
         return ranks_match and hand[1] != hand[3]
 
 
+def _parse_children(data: str) -> List[Node]:
+    """
+    Parse the output of a `show_children` command
+    """
+    if "ERROR" in data:
+        return []
+    if data.strip() == "":
+        return []
+    children_lines = data.split("\n\n")
+    children = []
+    # From the docs, each child entry is of the form:
+    # 'child n:' nodeID NODE_TYPE board pot children_no 'flags: f1 f2'
+    for child_line in children_lines:
+        items = child_line.split("\n")
+        node_data = items[1:]
+        child_node = Node("\n".join(node_data))
+        children.append(child_node)
+
+    return children
+
+
 _NO_OUTPUT_COMMANDS = [
     "is_ready",
     "set_end_string",
@@ -1,8 +1,25 @@
 from collections import namedtuple
+from hashlib import sha1
+from os import path as osp
+from typing import List, Optional
+import os
+import pickle
+import re
+import sys
+import tempfile
+
+import numpy as np
+
 from .solver import Solver
 from ..util import card_tuple
 from ..conf import pious_conf
 
+CACHE_DIRECTORY = osp.join(osp.expanduser("~"), ".cache", "pious")
+# Cached `show_all_lines()` results, one file per tree. Each holds every line
+# of its tree, so only a few are kept.
+LINES_CACHE_DIRECTORY = osp.join(CACHE_DIRECTORY, "lines")
+MAX_CACHED_LINES_FILES = 16
+
 
 def make_solver(
     debug=False,
@@ -30,11 +47,136 @@ def make_solver(
     )
 
 
+def load_cached_pickle(cache_file: str):
+    """
+    Load a pickled cache entry, returning `None` if there is no such entry or
+    the cache can't be accessed. Entries that can't be unpickled (e.g., after
+    an interrupted write, or when written by a different version of pandas)
+    are deleted so that the caller recomputes and replaces them.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            obj = pickle.load(f)
+    except OSError:
+        return None
+    except (
+        pickle.UnpicklingError,
+        EOFError,
+        AttributeError,
+        ImportError,
+        IndexError,
+        TypeError,
+        ValueError,
+    ):
+        try:
+            os.remove(cache_file)
+        except OSError:
+            pass
+        return None
+    try:
+        # Mark the entry as recently used for `prune_cache_directory`
+        os.utime(cache_file)
+    except OSError:
+        pass
+    return obj
+
+
+def dump_cached_pickle(cache_file: str, obj):
+    """
+    Pickle `obj` to `cache_file`. The entry is written to a temporary file and
+    then moved into place, so readers never see a partially written entry.
+    """
+    cache_dir = osp.dirname(cache_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_file, cache_file)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def prune_cache_directory(cache_dir: str, max_entries: int):
+    """
+    Delete the least recently used `.pkl` entries in `cache_dir` until at most
+    `max_entries` remain
+    """
+    try:
+        entries = [
+            e for e in os.scandir(cache_dir) if e.is_file() and e.name.endswith(".pkl")
+        ]
+    except OSError:
+        return
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for e in entries[: len(entries) - max_entries]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+
+def cached_show_all_lines(
+    solver: Solver, cfr_path: Optional[str] = None, cache_dir: Optional[str] = None
+) -> List[str]:
+    """
+    Return `solver.show_all_lines()` for the tree at `cfr_path`, caching the
+    result on disk so that subsequent calls for the same (unmodified) tree
+    skip the expensive `load_all_nodes()`/`show_all_lines()` round trip.
+
+    :param solver: a solver with the tree at `cfr_path` loaded
+    :param cfr_path: the tree's path (defaults to the solver's loaded tree)
+    :param cache_dir: where to store cached lines (defaults to
+        `LINES_CACHE_DIRECTORY`). Only the `MAX_CACHED_LINES_FILES` most
+        recently used trees are kept.
+    :returns: all lines in the tree
+    """
+    if cfr_path is None:
+        cfr_path = solver.cfr_file_path
+    if cache_dir is None:
+        cache_dir = LINES_CACHE_DIRECTORY
+    cfr_path = osp.abspath(cfr_path)
+    key = sha1(f"{cfr_path}:{osp.getmtime(cfr_path)}".encode()).hexdigest()
+    cache_file = osp.join(cache_dir, f"{key}.pkl")
+
+    lines = load_cached_pickle(cache_file)
+    if lines is not None:
+        return lines
+
+    solver.load_all_nodes()
+    lines = solver.show_all_lines()
+    try:
+        dump_cached_pickle(cache_file, lines)
+        prune_cache_directory(cache_dir, MAX_CACHED_LINES_FILES)
+    except OSError:
+        # Caching is best effort: we still have the lines
+        pass
+    return lines
+
+
+# Colors of the textures seen so far. There are only a few thousand distinct
+# textures, so after the first call for a texture `color_texture` is a single
+# dict lookup instead of a scan of the texture's labels.
+_TEXTURE_COLORS = {}
+
+
 def color_texture(texture):
     """
     Return a coloration of a texture
     """
+    color = _TEXTURE_COLORS.get(texture)
+    if color is None:
+        color = _TEXTURE_COLORS[texture] = _texture_color(texture)
+    return color
 
+
+def _texture_color(texture):
     red = "00"
     green = "00"
     blue = "00"
@@ -72,21 +214,50 @@ def color_texture(texture):
 
 
 def marker_size_from_high_card(flop, max_size=None, min_size=10):
+    r, s = card_tuple(flop.split()[0])
+    return marker_sizes_from_high_cards(r, max_size=max_size, min_size=min_size)
+
+
+def marker_sizes_from_high_cards(high_cards, max_size=None, min_size=10):
+    """
+    Vectorized `marker_size_from_high_card`: compute marker sizes from the
+    rank (2-14) of each flop's high card. `high_cards` can be a single rank or
+    an array of ranks.
+    """
     if max_size is None:
         max_size = 220
-    r, s = card_tuple(flop.split()[0])
     factor = (max_size / min_size) ** (1 / 12)
-    size = min_size * factor ** (r - 2)
-    return size
+    return min_size * factor ** (np.asarray(high_cards, dtype=np.float64) - 2)
 
 
 Info = namedtuple("Info", ["player", "node_id", "line", "starting_stacks"])
 
 
+# Matches the fields of an aggregation report's info.txt, e.g.:
+#
+#     OOP Decision
+#     Node id: r:0
+#     Board: As 9s 6h
+#     Line: Root
+#     Starting stacks: 300
+_INFO_RE = re.compile(
+    r"\A\s*(?P<player>\S+)"
+    r".*?^Node id:(?P<node_id>.*?)$"
+    r".*?^Line:(?P<line>.*?)$"
+    r".*?^Starting stacks:\s*(?P<starting_stacks>\d+)",
+    re.MULTILINE | re.DOTALL,
+)
+
+
 def parse_info(info: str):
-    lines = info.splitlines()
-    player = lines[0].strip().split()[0]
-    node_id = lines[1][9:].strip()
-    line = lines[3][6:].strip()
-    starting_stacks = int(lines[4].split(":")[1].strip())
-    return Info(player, node_id, line, starting_stacks)
+    m = _INFO_RE.match(info)
+    if m is None:
+        raise ValueError(f"Unable to parse aggregation report info:\n{info}")
+    # Players and lines repeat across the reports of a tree, so intern them to
+    # share their strings
+    return Info(
+        sys.intern(m["player"]),
+        sys.intern(m["node_id"].strip()),
+        sys.intern(m["line"].strip()),
+        int(m["starting_stacks"]),
+    )
@@ -1,5 +1,6 @@
+from functools import lru_cache
 from itertools import combinations, permutations
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple
 import numpy as np
 from ansi.colour import fg, fx
 
@@ -239,9 +240,48 @@ def ahml(rank):
         return "L"
 
 
+class VisibleColumns:
+    """
+    Project a frame's columns onto those not in a list of hidden columns,
+    keeping their order. Reports, comparisons and `Flops` expose their hidden
+    columns as a public, mutable list, so the projection is checked against
+    the list on each call and only recomputed when it (or the frame's
+    columns) changed.
+    """
+
+    def __init__(self):
+        self._columns = None
+        self._hidden: Optional[Tuple[str, ...]] = None
+        self._visible: List[str] = []
+
+    def __call__(self, columns: Sequence[str], hidden_columns) -> List[str]:
+        hidden = tuple(hidden_columns)
+        if columns is not self._columns or hidden != self._hidden:
+            hidden_set = set(hidden)
+            self._visible = [c for c in columns if c not in hidden_set]
+            self._columns = columns
+            self._hidden = hidden
+        return self._visible
+
+
+# Maps each of the 52 cards to its (rank, suit) tuple
+CARD_LUT = {r + s: (rv, s) for (r, rv) in ranks.items() if len(r) == 1 for s in "cdhs"}
+
+
 def card_tuple(c):
-    r, s = c.strip()
-    return ranks[r], s
+    """
+    Return the (rank, suit) of a card
+
+    >>> card_tuple("Ts")
+    (10, 's')
+    >>> card_tuple(" 9h")
+    (9, 'h')
+    """
+    t = CARD_LUT.get(c)
+    if t is None:
+        r, s = c.strip()
+        t = ranks[r], s
+    return t
 
 
 def color_suit(suit, mode="DARK_MODE", width=1, align="^"):
@@ -273,6 +313,7 @@ def color_suit(suit, mode="DARK_MODE", width=1, align="^"):
     return s
 
 
+@lru_cache(maxsize=256)
 def color_card(c, remove_suit=False, mode="DARK_MODE"):
     if c not in CARDS:
         raise ValueError(f"Invalid card {c}")
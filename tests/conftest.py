@@ -0,0 +1,15 @@
+from collections import OrderedDict
+import pytest
+from pious.pio import aggregation
+
+
+@pytest.fixture(autouse=True)
+def report_cache_directory(tmp_path, monkeypatch):
+    """
+    Keep processed aggregation reports out of the user's cache directory, and
+    out of the in-memory cache shared between tests
+    """
+    cache_dir = str(tmp_path / "report_cache")
+    monkeypatch.setattr(aggregation, "REPORT_CACHE_DIRECTORY", cache_dir)
+    monkeypatch.setattr(aggregation, "_processed_reports", OrderedDict())
+    return cache_dir
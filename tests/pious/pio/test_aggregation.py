@@ -1,3 +1,8 @@
+import os
+import shutil
+import pytest
+from pious.pio import aggregation
+import pandas as pd
 from pious.pio.aggregation import load_report_to_df, AggregationReport
 from pious.pio.resources import get_database_root, get_aggregation_root
 
@@ -41,3 +46,319 @@ def test_aggregation_report():
     assert len(r._report_cache) == 2, "Report caching error"
     assert len(r2._report_cache) == 2, "Report caching error"
     assert len(r3._report_cache) == 2, "Report caching error"
+
+
+def test_filter_masks_are_cached():
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    r.filter("r1 == 14")
+    assert ("r1 == 14",) in r._filter_masks
+    mask = r._filter_masks[("r1 == 14",)]
+
+    r.reset("r1 == 14")
+    assert r._filter_masks[("r1 == 14",)] is mask
+    assert len(r) == 2
+
+    r.filter("flushdraw")
+    n = len(r)
+    r.undo_filter()
+    assert len(r) == 2
+    r.filter("flushdraw")
+    assert len(r) == n
+
+
+def test_chained_filters_use_the_filtered_view():
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    r.filter("r1 >= 12").filter("ev > ev.mean()")
+    high = r._df[r._df["r1"] >= 12]
+    assert len(r) == (high["ev"] > high["ev"].mean()).sum() == 3
+    assert ("r1 >= 12", "ev > ev.mean()") in r._filter_masks
+
+    # Replaying the chain reuses its masks, even after sorting the view
+    mask = r._filter_masks[("r1 >= 12", "ev > ev.mean()")]
+    r.undo_filter()
+    r.sort_by("ev")
+    r.filter("ev > ev.mean()")
+    assert len(r) == 3
+    assert r._filter_masks[("r1 >= 12", "ev > ev.mean()")] is mask
+
+    r.reset("ev > ev.mean()")
+    assert len(r) == (r._df["ev"] > r._df["ev"].mean()).sum()
+
+
+def test_view_operations_leave_df_unchanged():
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    flops = r._df["raw_flop"].tolist()
+    r.sort_by("ev")
+    assert r._view["ev"].is_monotonic_increasing
+    assert r._df["raw_flop"].tolist() == flops
+    assert "r1" not in r.view().columns
+    assert "r1" in r._df.columns
+    assert r.hidden_columns[-3:] == ["ip_equity", "ip_ev", "ip_eqr"]
+    assert "ip_ev" not in r.view().columns
+
+    # Changes to `hidden_columns` show up in the view
+    r.hidden_columns.append("eqr")
+    assert "eqr" not in r.view().columns
+    r.hidden_columns = [c for c in r.hidden_columns if c != "r1"]
+    assert "r1" in r.view().columns
+    r.reset()
+    assert r._view["raw_flop"].tolist() == flops
+
+
+def textures_df(flops):
+    """
+    Run flop processing and texture computation on a bare report frame
+    """
+    r = AggregationReport.__new__(AggregationReport)
+    r._df = pd.DataFrame({"flop": flops})
+    r._process_flops()
+    r._compute_textures()
+    return r._df.set_index("raw_flop")
+
+
+def test_compute_textures():
+    flag_columns = [
+        "straight",
+        "wheel",
+        "oesd",
+        "gutshot",
+        "straightdraw",
+        "wheeldraw",
+        "broadwaydraw",
+    ]
+    expected = {
+        "As Js 6s": (
+            ("A_high", "UNPAIRED", "MONOTONE", "OESD", "AHM"),
+            {"oesd", "gutshot", "straightdraw", "broadwaydraw"},
+        ),
+        "Ah 3d 2c": (
+            ("A_high", "UNPAIRED", "RAINBOW", "STRAIGHT", "ALL"),
+            {"straight", "wheel"},
+        ),
+        "Kh Qd Jc": (
+            ("K_high", "UNPAIRED", "RAINBOW", "STRAIGHT", "HHH"),
+            {"straight"},
+        ),
+        "Ac Ad 4c": (
+            ("A_high", "PAIRED", "FD", "GUTSHOT", "AAL"),
+            {"straightdraw", "wheeldraw"},
+        ),
+        "7c 7d 7h": (("7_high", "TOAK", "RAINBOW", "DISCONNECTED", "MMM"), set()),
+        "9h 5d 2c": (
+            ("9_high", "UNPAIRED", "RAINBOW", "OESD", "MLL"),
+            {"oesd", "gutshot", "straightdraw"},
+        ),
+        "Kh 8d 2c": (("K_high", "UNPAIRED", "RAINBOW", "DISCONNECTED", "HML"), set()),
+    }
+    df = textures_df(list(expected))
+    for flop, (texture, flags) in expected.items():
+        row = df.loc[flop]
+        assert row["texture"] == texture, flop
+        assert {c for c in flag_columns if row[c]} == flags, flop
+    assert df.loc["Ac Ad 4c", "paired"]
+    assert df.loc["7c 7d 7h", "toak"]
+    assert df.loc["As Js 6s", "flush"]
+    assert df.loc["Kh 8d 2c", "rainbow"]
+
+
+def test_processed_reports_are_cached(tmp_path, report_cache_directory):
+    report_dir = tmp_path / "report"
+    shutil.copytree(get_aggregation_root(), report_dir)
+    r1 = AggregationReport(str(report_dir))
+    assert len(os.listdir(report_cache_directory)) == 1
+
+    # Reload from disk rather than from the in-memory cache
+    aggregation._processed_reports.clear()
+    r2 = AggregationReport(str(report_dir))
+    assert r2.header == r1.header
+    pd.testing.assert_frame_equal(r2._df, r1._df)
+    assert len(os.listdir(report_cache_directory)) == 1
+
+    # Touching the report invalidates the cached frame
+    csv_path = report_dir / "report.csv"
+    mtime = os.path.getmtime(csv_path)
+    os.utime(csv_path, (mtime + 10, mtime + 10))
+    r3 = AggregationReport(str(report_dir))
+    pd.testing.assert_frame_equal(r3._df, r1._df)
+    assert len(os.listdir(report_cache_directory)) == 2
+
+
+def test_corrupt_report_cache_is_replaced(report_cache_directory):
+    r1 = AggregationReport(get_aggregation_root())
+    (cache_file,) = os.listdir(report_cache_directory)
+    cache_path = os.path.join(report_cache_directory, cache_file)
+    with open(cache_path, "r+b") as f:
+        f.truncate(100)
+
+    aggregation._processed_reports.clear()
+    r2 = AggregationReport(get_aggregation_root())
+    pd.testing.assert_frame_equal(r2._df, r1._df)
+    assert os.listdir(report_cache_directory) == [cache_file]
+    assert os.path.getsize(cache_path) > 100
+
+
+def test_unwritable_report_cache_is_skipped(tmp_path, monkeypatch):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    monkeypatch.setattr(
+        aggregation, "REPORT_CACHE_DIRECTORY", str(not_a_directory / "reports")
+    )
+    r = AggregationReport(get_aggregation_root())
+    assert len(r) == 7
+
+
+def test_report_cache_directory_is_bounded(
+    tmp_path, monkeypatch, report_cache_directory
+):
+    monkeypatch.setattr(aggregation, "MAX_CACHED_REPORT_FILES", 1)
+    for name in ("report1", "report2"):
+        shutil.copytree(get_aggregation_root(), tmp_path / name)
+        AggregationReport(str(tmp_path / name))
+    assert len(os.listdir(report_cache_directory)) == 1
+
+
+def test_load_report_to_df():
+    header, df = load_report_to_df(os.path.join(get_aggregation_root(), "report.csv"))
+    assert len(header) == 3
+    assert header[2].strip() == "Action Line,Root"
+    assert len(df) == 7
+    assert df["Flop"].str.strip().str.len().min() > 0
+    assert (df.drop(columns="Flop").dtypes == "float64").all()
+
+
+def test_load_turn_report():
+    turn_root = os.path.join(get_aggregation_root(), "CHECK", "CHECK")
+    header, df = load_report_to_df(os.path.join(turn_root, "report.csv"))
+    assert list(df.columns[:3]) == ["Flop", "Turn", "Global %"]
+    assert df["Turn"].dropna().str.len().eq(2).all()
+    assert (df.drop(columns=["Flop", "Turn"]).dtypes == "float64").all()
+
+    r = AggregationReport(turn_root)
+    assert len(r) == len(df)
+
+
+def test_filter_mask_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(aggregation, "MAX_CACHED_FILTER_MASKS", 2)
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    r.reset("r1 == 14")
+    r.reset("r1 == 13")
+    r.reset("r1 == 14")
+    r.reset("r1 == 12")
+    assert list(r._filter_masks) == [("r1 == 14",), ("r1 == 12",)]
+    assert len(r) == 1
+
+
+def test_texture_colors():
+    from matplotlib.colors import to_rgba_array
+    from pious.pio.util import color_texture
+
+    df = textures_df(["As Js 6s", "Ah 3d 2c", "Ac Ad 4c", "7c 7d 7h", "Kh 8d 2c"])
+    colors = aggregation.texture_colors(df)
+    assert colors.tolist() == [color_texture(t) for t in df["texture"]]
+    rgba = aggregation.texture_colors(df, rgba=True)
+    assert rgba.shape == (5, 4)
+    assert (rgba == to_rgba_array(colors.tolist())).all()
+
+
+def test_label_columns_are_categorical():
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    for col in ("s1", "pairedness", "suitedness", "connectedness", "high_card"):
+        assert isinstance(r._df[col].dtype, pd.CategoricalDtype), col
+    assert r._df["r1"].dtype == "int64"
+    assert len(r.reset("suitedness == 'RAINBOW' and s1 == 's'")) == 2
+    # Rank arithmetic in queries must not overflow
+    assert len(r.reset("r1 * r2 > 100")) == 3
+    assert len(r.reset("r1 * 10 > 130")) == 2
+
+
+def test_clean_column_names():
+    r = AggregationReport.__new__(AggregationReport)
+    r.ip = False
+    r._df = pd.DataFrame(
+        columns=[
+            "Flop",
+            "Global %",
+            "OOP Equity",
+            "OOP EV",
+            "IP EQR",
+            "BET 300 freq",
+            "CHECK freq",
+            "OOP Fold freq",
+        ]
+    )
+    r._clean_column_names()
+    assert list(r._df.columns) == [
+        "flop",
+        "global_freq",
+        "equity",
+        "ev",
+        "ip_eqr",
+        "bet_300",
+        "check",
+        "fold_freq",
+    ]
+
+
+def test_in_browser(monkeypatch):
+    opened = []
+    monkeypatch.setattr(aggregation.webbrowser, "open", opened.append)
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    r.in_browser()
+    path = opened[0][len("file://") :]
+    with open(path) as f:
+        html = f.read()
+    os.remove(path)
+    assert html == r.view().to_html()
+
+
+def test_processed_reports_are_shared_in_memory(tmp_path, monkeypatch):
+    r1 = AggregationReport(get_aggregation_root())
+    r2 = AggregationReport(get_aggregation_root())
+    assert r2._df is r1._df
+    assert r1 is not r2
+
+    # Reports are only shared while the report is unchanged
+    report_dir = tmp_path / "report"
+    shutil.copytree(get_aggregation_root(), report_dir)
+    r3 = AggregationReport(str(report_dir))
+    csv_path = report_dir / "report.csv"
+    mtime = os.path.getmtime(csv_path)
+    os.utime(csv_path, (mtime + 10, mtime + 10))
+    r4 = AggregationReport(str(report_dir))
+    assert r4._df is not r3._df
+    pd.testing.assert_frame_equal(r4._df, r3._df)
+
+    aggregation._processed_reports.clear()
+    monkeypatch.setattr(aggregation, "MAX_CACHED_REPORTS", 1)
+    AggregationReport(get_aggregation_root())
+    r5 = AggregationReport(str(report_dir))
+    assert list(aggregation._processed_reports.values()) == [(r5.header, r5._df)]
+
+
+def test_process_flops_parsing():
+    df = textures_df(["As 9s 6h", " Kh  Td 2c"])
+    assert df.loc[" Kh  Td 2c", "flop"] == ((13, 10, 2), ("h", "d", "c"))
+    assert df.loc["As 9s 6h", ["r1", "r2", "r3"]].tolist() == [14, 9, 6]
+    assert df.index.tolist() == ["As 9s 6h", " Kh  Td 2c"]
+
+    with pytest.raises(ValueError):
+        textures_df(["Xs 9s 6h"])
+    with pytest.raises(ValueError):
+        textures_df(["As 9s"])
+
+
+def test_plot_hover_annotation():
+    import matplotlib.pyplot as plt
+    from matplotlib.backend_bases import MouseEvent
+
+    r = AggregationReport(get_aggregation_root(), get_database_root())
+    r.plotter.scatter("ev", "check", legend=False)
+    fig = plt.gcf()
+    ax = fig.axes[0]
+    fig.canvas.draw()
+    x, y = ax.transData.transform(ax.collections[0].get_offsets()[3])
+    event = MouseEvent("motion_notify_event", fig.canvas, x, y)
+    fig.canvas.callbacks.process("motion_notify_event", event)
+    shown = [t.get_text() for t in ax.texts if t.get_visible()]
+    plt.close(fig)
+    assert shown == [r.view()["raw_flop"].iloc[3]]
@@ -1,8 +1,19 @@
 import pytest
 import os
-from pious.pio.blockers import compute_single_card_blocker_effects
+from pious.pio.blockers import (
+    SingleCardBlockerEffects,
+    color_effect,
+    compute_single_card_blocker_effects,
+    equity_deltas_as_arrays,
+    linear_color_gradient,
+    linear_color_gradient_batch,
+    sort_equity_deltas,
+)
 from pious.pio.util import make_solver
 import importlib.resources
+import numpy as np
+from ansi.colour.rgb import rgb256
+from ansi.colour.fx import reset
 
 cfr_db_path = importlib.resources.files("pious.pio.resources.database")
 cfr_path = cfr_db_path / "2c2s2d.cfr"
@@ -15,3 +26,65 @@ def test_blocker_effects():
 
     effects = compute_single_card_blocker_effects(s, "r:0:c")
     print(effects)
+
+
+def test_linear_color_gradient_batch_matches_scalar():
+    values = [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]
+    batch = linear_color_gradient_batch(values, 0.0, 1.0)
+    assert batch == [linear_color_gradient(v, 0.0, 1.0) for v in values]
+
+    batch = linear_color_gradient_batch(values, 0.0, 1.0, bg=True)
+    assert batch == [linear_color_gradient(v, 0.0, 1.0, bg=True) for v in values]
+
+    assert linear_color_gradient_batch([], 0.0, 1.0) == []
+
+
+def test_color_effect():
+    assert color_effect(-0.01, "x", -0.02, 0.02) == f"{rgb256(255, 127, 127)}x{reset}"
+    assert color_effect(0.02, "x", -0.02, 0.02) == f"{rgb256(0, 255, 0)}x{reset}"
+    assert color_effect(0.0, "x", -0.02, 0.02) == f"{rgb256(255, 255, 255)}x{reset}"
+
+
+def test_sort_equity_deltas():
+    deltas = {"As": 0.1, "Kd": -0.2, "Qh": 0.1, "2c": 0.3}
+    assert sort_equity_deltas(deltas) == sorted(deltas.items(), key=lambda x: x[1])
+    assert sort_equity_deltas(deltas, reverse=True) == sorted(
+        deltas.items(), key=lambda x: x[1], reverse=True
+    )
+    assert sort_equity_deltas(deltas, board=("2c", "Kd"), reverse=True) == [
+        ("As", 0.1),
+        ("Qh", 0.1),
+    ]
+    assert sort_equity_deltas({}) == []
+
+
+def test_equity_deltas_as_arrays():
+    deltas = {"As": 0.1, "Kd": -0.2}
+    for equity_deltas in (
+        deltas,
+        list(deltas.items()),
+        (np.array(["As", "Kd"]), np.array([0.1, -0.2])),
+    ):
+        cards, values = equity_deltas_as_arrays(equity_deltas)
+        assert cards.tolist() == ["As", "Kd"]
+        assert values.tolist() == [0.1, -0.2]
+
+    effects = SingleCardBlockerEffects(("2c", "2s", "2d"), "r:0", deltas, {}, {})
+    assert effects.equity_deltas == deltas
+
+
+def test_print_graph_keeps_tie_order(monkeypatch):
+    from pious.pio import blockers
+
+    graphed = []
+    monkeypatch.setattr(
+        blockers,
+        "print_equity_delta_graph",
+        lambda equity_deltas, *args, **kwargs: graphed.append(equity_deltas),
+    )
+    deltas = {"As": 0.1, "Kd": -0.2, "Qh": 0.1, "2c": 0.3}
+    effects = SingleCardBlockerEffects(("2c", "2s", "2d"), "r:0", deltas, {}, {})
+    effects.print_graph()
+    cards, values = graphed[0]
+    expected = sorted(deltas.items(), key=lambda x: x[1], reverse=True)
+    assert list(zip(cards.tolist(), values.tolist())) == expected
@@ -0,0 +1,72 @@
+import pandas as pd
+from pious.pio.aggregation import AggregationReport
+from pious.pio.compare import AggregationComparator
+from pious.pio.resources import get_database_root, get_aggregation_root
+
+
+def make_comparator():
+    r1 = AggregationReport(get_aggregation_root(), get_database_root())
+    r2 = r1.take_action("CHECK")
+    return r1, r2, AggregationComparator(r1, r2)
+
+
+def test_comparator_join():
+    r1, r2, c = make_comparator()
+    df = c._df
+    assert len(df) == 7
+    assert df["raw_flop"].tolist() == r1._df["raw_flop"].tolist()
+    assert df.index.tolist() == list(range(7))
+    assert list(df.columns[:5]) == ["raw_flop", "ev_1", "eqr_1", "ev_2", "eqr_2"]
+    assert "texture" in df.columns
+
+    row = df[df["raw_flop"] == "As 9s 6h"].iloc[0]
+    r1_row = r1._df[r1._df["raw_flop"] == "As 9s 6h"].iloc[0]
+    r2_row = r2._df[r2._df["raw_flop"] == "As 9s 6h"].iloc[0]
+    assert row["ev_1"] == r1_row["ev"]
+    assert row["ev_2"] == r2_row["ev"]
+    assert row["r1"] == r1_row["r1"]
+
+
+def test_comparator_filter_and_sort_on_categorical_flops():
+    _, _, c = make_comparator()
+    assert isinstance(c._df["raw_flop"].dtype, pd.CategoricalDtype)
+    c.filter("raw_flop == 'As 9s 6h'")
+    assert len(c._view) == 1
+    c.reset()
+    c.sort_by("raw_flop")
+    assert c._view["raw_flop"].tolist() == sorted(c._df["raw_flop"].tolist())
+
+
+def test_comparator_undo_filter():
+    _, _, c = make_comparator()
+    c.filter("r1 == 14")
+    assert len(c._view) == 2
+    c.filter("flushdraw")
+    n = len(c._view)
+    c.undo_filter()
+    assert len(c._view) == 2
+    assert c.filters() == ["r1 == 14"]
+    c.filter("flushdraw")
+    assert len(c._view) == n
+    c.undo_filter(5)
+    assert len(c._view) == 7
+    assert c.filters() == []
+
+
+def test_comparator_chained_filters_use_the_filtered_view():
+    _, _, c = make_comparator()
+    c.filter("r1 >= 12").filter("ev_1 > ev_1.mean()")
+    high = c._df[c._df["r1"] >= 12]
+    assert len(c._view) == (high["ev_1"] > high["ev_1"].mean()).sum()
+    assert ("r1 >= 12", "ev_1 > ev_1.mean()") in c._filter_masks
+
+
+def test_comparator_join_type():
+    r1, r2, _ = make_comparator()
+    r2._df = r2._df[r2._df["raw_flop"] != "As 9s 6h"]
+    assert len(AggregationComparator(r1, r2)._df) == 6
+    df = AggregationComparator(r1, r2, join_type="left")._df
+    assert len(df) == 7
+    row = df[df["raw_flop"] == "As 9s 6h"].iloc[0]
+    assert pd.isna(row["ev_2"])
+    assert row["ev_1"] == r1._df[r1._df["raw_flop"] == "As 9s 6h"]["ev"].iloc[0]
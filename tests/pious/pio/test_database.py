@@ -0,0 +1,60 @@
+import pytest
+from os import path as osp
+from itertools import product
+from pious.pio.database import (
+    CFRDatabase,
+    ALL_SUIT_PERMUTATIONS,
+    apply_permutation,
+    permuted_signatures,
+    suits_signature,
+)
+from pious.pio.resources import get_database_root
+
+
+def test_find_isomorphic_board():
+    db = CFRDatabase(get_database_root())
+    assert db.find_isomorphic_board("As9s6h") == "As9s6h"
+    assert db.find_isomorphic_board("Ad 9d 6c") == "As9s6h"
+    assert db.find_isomorphic_board("Kc5d4d") == "Ks5h4h"
+    assert db.find_isomorphic_board("2h2s2c") == "2c2s2d"
+    with pytest.raises(ValueError):
+        # Right ranks, wrong suit pattern
+        db.find_isomorphic_board("Ad9c6c")
+    with pytest.raises(KeyError):
+        db["3s3h3d"]
+
+
+def test_permuted_signatures_match_apply_permutation():
+    for suits in product("shdc", repeat=3):
+        expected = [
+            suits_signature(apply_permutation(suits, perm))
+            for perm in ALL_SUIT_PERMUTATIONS
+        ]
+        assert permuted_signatures(suits) == expected
+
+
+def test_database_ranks_to_boards(tmp_path):
+    for board in ["As9s6h", "Ad9c6c", "Kc5d4d", "Ks5h4h3c"]:
+        (tmp_path / f"{board}.cfr").touch()
+    db = CFRDatabase(str(tmp_path))
+    assert sorted(db.ranks_to_boards[("A", "9", "6")]) == ["Ad9c6c", "As9s6h"]
+    assert db.ranks_to_boards[("K", "5", "4", "3")] == ["Ks5h4h3c"]
+    assert db.find_isomorphic_board("Ah9h6d") == "As9s6h"
+    assert db.find_isomorphic_board("Ah9d6d") == "Ad9c6c"
+    assert db.find_isomorphic_board("Kd5c4c3h") == "Ks5h4h3c"
+
+
+def test_board_to_path():
+    root = get_database_root()
+    db = CFRDatabase(root)
+    assert db.board_to_path["As9s6h"] == osp.join(root, "As9s6h.cfr")
+    assert db.board_to_path[db["Ad9d6c", False]] == db["Ad9d6c"]
+
+
+def test_find_isomorphic_boards():
+    db = CFRDatabase(get_database_root())
+    queries = ["Ad 9d 6c", "3s3h3d", "Kc5d4d", "Ad9c6c", "2h2s2c"]
+    expected = ["As9s6h", None, "Ks5h4h", None, "2c2s2d"]
+    assert db.find_isomorphic_boards(queries) == expected
+    assert db.find_isomorphic_boards(queries + ["Kc5d4d3h"]) == expected + [None]
+    assert db.find_isomorphic_boards([]) == []
@@ -0,0 +1,100 @@
+import pytest
+from pious.pio.util import (
+    cached_show_all_lines,
+    color_texture,
+    marker_size_from_high_card,
+    marker_sizes_from_high_cards,
+    parse_info,
+    Info,
+)
+
+
+class LinesSolver:
+    def __init__(self, lines):
+        self.lines = lines
+        self.num_calls = 0
+
+    def load_all_nodes(self):
+        pass
+
+    def show_all_lines(self):
+        self.num_calls += 1
+        return list(self.lines)
+
+
+def test_cached_show_all_lines(tmp_path):
+    cfr_path = tmp_path / "tree.cfr"
+    cfr_path.write_text("")
+    cache_dir = tmp_path / "cache"
+
+    solver = LinesSolver(["r:0", "r:0:c", "r:0:c:c"])
+    lines = cached_show_all_lines(solver, str(cfr_path), cache_dir=str(cache_dir))
+    assert lines == ["r:0", "r:0:c", "r:0:c:c"]
+    assert solver.num_calls == 1
+
+    lines = cached_show_all_lines(solver, str(cfr_path), cache_dir=str(cache_dir))
+    assert lines == ["r:0", "r:0:c", "r:0:c:c"]
+    assert solver.num_calls == 1
+
+    # A truncated cache entry is replaced by querying the solver again
+    (cache_file,) = cache_dir.iterdir()
+    cache_file.write_bytes(cache_file.read_bytes()[:5])
+    lines = cached_show_all_lines(solver, str(cfr_path), cache_dir=str(cache_dir))
+    assert lines == ["r:0", "r:0:c", "r:0:c:c"]
+    assert solver.num_calls == 2
+    assert [p.name for p in cache_dir.iterdir()] == [cache_file.name]
+    lines = cached_show_all_lines(solver, str(cfr_path), cache_dir=str(cache_dir))
+    assert solver.num_calls == 2
+
+
+def test_cached_show_all_lines_is_best_effort(tmp_path, monkeypatch):
+    from pious.pio import util
+
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    solver = LinesSolver(["r:0"])
+    cfr_path = tmp_path / "tree.cfr"
+    cfr_path.write_text("")
+    cache_dir = str(not_a_directory / "cache")
+    assert cached_show_all_lines(solver, str(cfr_path), cache_dir) == ["r:0"]
+
+    # Only the most recently used trees are kept
+    monkeypatch.setattr(util, "MAX_CACHED_LINES_FILES", 2)
+    cache_dir = tmp_path / "cache"
+    for i in range(3):
+        tree = tmp_path / f"tree{i}.cfr"
+        tree.write_text("")
+        cached_show_all_lines(solver, str(tree), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_color_texture():
+    assert color_texture(("TOAK", "RAINBOW", "DISCONNECTED")) == "#0000ff"
+    assert color_texture(("UNPAIRED", "MONOTONE", "STRAIGHT")) == "#ffff00"
+    texture = ("A_high", "PAIRED", "FD", "OESD", "AAL")
+    assert color_texture(texture) == "#cc8899"
+    assert color_texture(texture) == "#cc8899"
+
+
+def test_marker_sizes_from_high_cards():
+    flops = ["As 9s 6h", "Ks 5h 4h", "2c 2s 2d"]
+    sizes = marker_sizes_from_high_cards([14, 13, 2], max_size=200)
+    assert sizes.tolist() == [marker_size_from_high_card(f, 200) for f in flops]
+    assert sizes[0] == pytest.approx(200)
+    assert sizes[2] == pytest.approx(10)
+
+
+def test_parse_info():
+    info = (
+        "IP Decision\n"
+        "Node id: r:0:c\n"
+        "Board: Ts 7h 4d\n"
+        "Line: Root,CHECK\n"
+        "Starting stacks: 300\n"
+        "\n"
+        "Report done without weighting flops.\n"
+    )
+    assert parse_info(info) == Info("IP", "r:0:c", "Root,CHECK", 300)
+    assert parse_info(info).line is parse_info(info).line
+    with pytest.raises(ValueError):
+        parse_info("IP Decision\n")
@@ -42,6 +42,15 @@ def test_show_node():
     assert n.pot == (850, 0, 300)
 
 
+@pytest.mark.skipif(os.name != "nt", reason="Only runs on Windows")
+def test_has_node():
+    solver = make_solver()
+    solver.load_tree(cfr_path)
+    assert solver.has_node("r:0")
+    assert solver.has_node("r:0:b850")
+    assert not solver.has_node("r:0:b12345")
+
+
 @pytest.mark.skipif(os.name != "nt", reason="Only runs on Windows")
 def test_show_children():
     solver = make_solver()
@@ -50,6 +59,15 @@ def test_show_children():
     assert len(children) == 3
 
 
+@pytest.mark.skipif(os.name != "nt", reason="Only runs on Windows")
+def test_show_children_ids():
+    solver = make_solver()
+    solver.load_tree(cfr_path)
+    children_ids = solver.show_children_ids("r:0")
+    assert children_ids == ["r:0:b850", "r:0:b300", "r:0:c"]
+    assert solver.show_children_ids("r:0:b12345") == []
+
+
 @pytest.mark.skipif(os.name != "nt", reason="Only runs on Windows")
 def test_show_children_actions():
     solver = make_solver()
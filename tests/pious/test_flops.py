@@ -0,0 +1,65 @@
+import pandas as pd
+from pious.flops import Flops, process_flops, compute_textures
+
+
+def test_flop_textures():
+    flops = Flops()
+    assert len(flops) == 1755
+    df = flops._df.set_index("raw_flop")
+    assert df.loc["AcKcQc", "texture"] == (
+        "A_high",
+        "UNPAIRED",
+        "MONOTONE",
+        "STRAIGHT",
+        "AHH",
+    )
+    assert df.loc["Ah3d2c", "wheel"]
+    assert df.loc["9h5d2c", "oesd"]
+    assert df.loc["KcKdKh", "toak"]
+
+    flops.filter("straight and not flush")
+    assert len(flops) == 256
+    flops.reset("pairedness == 'TOAK'")
+    assert len(flops) == 13
+    flops.reset("r1 == 14 and s1 == 'h' and rainbow")
+    assert len(flops) == 78
+
+    assert flops._df["r1"].dtype == "int64"
+    assert flops._df["s1"].dtype == "category"
+
+
+def test_flops_filters_do_not_modify_df():
+    flops = Flops()
+    flops.filter("flush").filter("straight")
+    assert len(flops) == 64
+    assert len(flops._df) == 1755
+    flops.undo_filter()
+    assert len(flops) == 286
+    assert flops._current_filters == ["flush"]
+    flops.undo_filter(5)
+    assert len(flops) == 1755
+    assert "r1" not in flops.view().columns
+    flops.hidden_columns.remove("r1")
+    assert "r1" in flops.view().columns
+
+
+def test_flop_formats_share_textures():
+    flops = ["As9s6h", "As 9s 6h", " As  9s 6h"]
+    df = pd.DataFrame({"flop": flops})
+    textures = compute_textures(process_flops(df))
+    assert df.columns.tolist() == ["flop"]
+    assert textures["flop"].nunique() == 1
+    assert textures["texture"].nunique() == 1
+    assert sorted(textures["raw_flop"]) == sorted(flops)
+
+
+def test_dump_restores_display_options():
+    pd.set_option("display.max_rows", 5)
+    try:
+        flops = Flops()
+        flops.filter("toak")
+        s = flops.dump()
+        assert len(s.splitlines()) == 14
+        assert pd.get_option("display.max_rows") == 5
+    finally:
+        pd.reset_option("display.max_rows")